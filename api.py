@@ -0,0 +1,743 @@
+"""FastAPI 后端服务
+
+提供 PPT 上传、解析、层级分析、LLM 内容扩充、搜索与结果下载接口。
+"""
+
+import asyncio
+import re
+import time
+import uuid
+from collections import OrderedDict, defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+import msgspec
+import orjson
+import zstandard
+from jinja2 import Environment, FileSystemLoader
+from fastapi import FastAPI, File, Form, HTTPException, Request, UploadFile
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import FileResponse, Response
+
+from config import settings
+from llm_client import llm_client
+from ppt_parser import PPTParser, PPTStructure
+
+
+class MsgspecJSONResponse(Response):
+    """用 msgspec 做响应编码，绕开 FastAPI 默认的 Pydantic 序列化"""
+
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return msgspec.json.encode(content)
+
+
+app = FastAPI(
+    title="PPT 内容扩展智能体",
+    version="1.0.0",
+    default_response_class=MsgspecJSONResponse,
+)
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+# 大扩充结果动辄几百 KB JSON，gzip 压缩 5-10 倍后传输时间是首要收益
+app.add_middleware(GZipMiddleware, minimum_size=1000)
+
+UPLOAD_DIR = Path(settings.upload_dir)
+UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+OUTPUT_DIR = Path(settings.output_dir)
+OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+
+ppt_parser = PPTParser()
+
+# 内存态存储：file_id -> 文件记录 / result_id -> 扩充结果
+# 解析结构和扩充结果体积很大，内存里只保留最近使用的若干份，
+# 其余按需从磁盘上的产物文件重新加载。
+MAX_IN_MEMORY = 64
+
+file_store: "OrderedDict[str, dict]" = OrderedDict()
+expansion_results: "OrderedDict[str, dict]" = OrderedDict()
+# file_id -> 该文件名下所有扩充结果的 result_id，删除文件时据此
+# 连同内存条目和溢出的 msgpack 落盘文件一起清理
+expansion_ids_by_file: "defaultdict[str, set]" = defaultdict(set)
+
+# /api/files 的预计算摘要，按上传时间倒序维护，省掉每次请求的重建和排序
+file_summary_list: List[dict] = []
+
+# 解析结构在内存里常驻压缩形态（level 3 对 JSON 文本通常有 4-8x 压缩比），
+# 只有 LRU 热点条目才持有解压后的 PPTStructure 对象。
+_zstd_compress = zstandard.ZstdCompressor(level=3).compress
+_zstd_decompress = zstandard.ZstdDecompressor().decompress
+
+
+def _compress_structure(structure: PPTStructure) -> bytes:
+    return _zstd_compress(orjson.dumps(structure.model_dump()))
+
+
+_TOKEN_RE = re.compile(r"\w+")
+_CJK_RE = re.compile(r"[\u4e00-\u9fff]")
+
+
+def _tokenize(text: str) -> List[str]:
+    """分词：英文按 \\w+ 成词，中文连续串再切成字符二元组
+
+    \\w+ 会把整段中文并成一个 token（如“云计算导论”），查
+    “云计算”时在倒排表里查不到任何条目。含 CJK 的 token 统一
+    切 bigram，索引和查询两侧用同一规则即可互相命中。
+    """
+    tokens = []
+    for token in _TOKEN_RE.findall(text):
+        if _CJK_RE.search(token) and len(token) > 1:
+            tokens.extend(token[i : i + 2] for i in range(len(token) - 1))
+        else:
+            tokens.append(token)
+    return tokens
+
+
+def _build_search_index(structure: PPTStructure):
+    """上传时预计算每页的小写全文与倒排索引，查询时只需查表"""
+    slide_texts = []
+    slide_titles = []
+    token_index = defaultdict(set)
+    for slide in structure.slides:
+        text = (
+            f"{slide.title} {' '.join(slide.content)} "
+            f"{' '.join(slide.bullet_points)}"
+        ).lower()
+        slide_texts.append(text)
+        slide_titles.append(slide.title)
+        for token in _tokenize(text):
+            token_index[token].add(slide.slide_number)
+    return slide_texts, slide_titles, dict(token_index)
+
+
+def _evict_structures():
+    """超出内存上限时，从最久未用的记录上剥离 structure 大对象"""
+    loaded = [fid for fid, rec in file_store.items() if rec.get("structure") is not None]
+    while len(loaded) > MAX_IN_MEMORY:
+        file_store[loaded.pop(0)]["structure"] = None
+
+
+def _load_structure(file_id: str) -> PPTStructure:
+    """取某文件的解析结构；内存未命中时从 {file_id}_parsed.json 重新加载"""
+    record = file_store[file_id]
+    structure = record.get("structure")
+    if structure is None:
+        blob = record.get("structure_zstd")
+        if blob is not None:
+            data = orjson.loads(_zstd_decompress(blob))
+        else:
+            parsed_path = UPLOAD_DIR / f"{file_id}_parsed.json"
+            data = orjson.loads(parsed_path.read_bytes())
+        structure = PPTStructure(**data)
+        record["structure"] = structure
+    file_store.move_to_end(file_id)
+    _evict_structures()
+    return structure
+
+
+def _evict_expansions():
+    """扩充结果同样只保留最近的若干份，溢出的落到 msgpack 文件"""
+    while len(expansion_results) > MAX_IN_MEMORY:
+        result_id, result = expansion_results.popitem(last=False)
+        backing = UPLOAD_DIR / f"{result_id}_expansion.msgpack"
+        if not backing.exists():
+            backing.write_bytes(msgspec.msgpack.encode(result))
+
+
+def _store_expansion(result_id: str, result: dict):
+    expansion_results[result_id] = result
+    if result.get("file_id"):
+        expansion_ids_by_file[result["file_id"]].add(result_id)
+    _evict_expansions()
+
+
+def _load_expansion(result_id: str) -> Optional[dict]:
+    result = expansion_results.get(result_id)
+    if result is not None:
+        expansion_results.move_to_end(result_id)
+        return result
+    backing = UPLOAD_DIR / f"{result_id}_expansion.msgpack"
+    if backing.exists():
+        result = msgspec.msgpack.decode(backing.read_bytes())
+        _store_expansion(result_id, result)
+        return result
+    return None
+
+
+class SlideExpansionRequest(msgspec.Struct):
+    """指定页扩充请求"""
+
+    slide_numbers: List[int] = msgspec.field(default_factory=list)
+    expansion_types: List[str] = msgspec.field(
+        default_factory=lambda: ["explanation", "example", "reading", "quiz"]
+    )
+
+
+class SearchRequest(msgspec.Struct):
+    """内容搜索请求"""
+
+    query: str
+    file_id: Optional[str] = None
+    top_k: int = 5
+
+
+async def decode_request(request: Request, struct_type):
+    """从请求体一次性解码并校验 msgspec.Struct"""
+    try:
+        return msgspec.json.decode(await request.body(), type=struct_type)
+    except (msgspec.DecodeError, msgspec.ValidationError) as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+@app.get("/health")
+async def health():
+    return {"status": "ok", "time": datetime.now().isoformat()}
+
+
+# ----------------------------------------------------------------------
+# 文件管理
+# ----------------------------------------------------------------------
+
+
+@app.post("/api/upload")
+async def upload_ppt(file: UploadFile = File(...), description: str = Form("")):
+    """上传并解析 PPT 文件"""
+    if not file.filename or not file.filename.lower().endswith((".ppt", ".pptx")):
+        raise HTTPException(status_code=400, detail="仅支持 .ppt / .pptx 文件")
+
+    file_id = uuid.uuid4().hex
+    file_path = UPLOAD_DIR / f"{file_id}_{file.filename}"
+    content = await file.read()
+    # 磁盘写与 CPU 密集的解析都放到线程池，避免阻塞事件循环
+    await asyncio.to_thread(file_path.write_bytes, content)
+
+    try:
+        structure = await asyncio.to_thread(ppt_parser.parse_pptx, str(file_path))
+    except Exception as e:
+        file_path.unlink(missing_ok=True)
+        raise HTTPException(status_code=422, detail=f"PPT 解析失败: {e}")
+
+    parsed_path = UPLOAD_DIR / f"{file_id}_parsed.json"
+    await asyncio.to_thread(
+        parsed_path.write_bytes,
+        orjson.dumps(structure.model_dump(), option=orjson.OPT_INDENT_2),
+    )
+
+    file_store[file_id] = {
+        "file_id": file_id,
+        "filename": file.filename,
+        "description": description,
+        "file_path": str(file_path),
+        "upload_time": datetime.now().isoformat(),
+        "total_slides": structure.total_slides,
+        "keywords": structure.keywords,
+        "structure": structure,
+        "structure_zstd": _compress_structure(structure),
+    }
+    slide_texts, slide_titles, token_index = _build_search_index(structure)
+    file_store[file_id]["slide_texts"] = slide_texts
+    file_store[file_id]["slide_titles"] = slide_titles
+    file_store[file_id]["token_index"] = token_index
+    _evict_structures()
+    # 向量索引放后台线程：编码整份 PPT 要数秒，不拖上传响应；
+    # 向量库不可用时静默跳过，关键词搜索不受影响
+    asyncio.get_running_loop().run_in_executor(
+        None, _index_file_vectors, file_id, structure
+    )
+    file_summary_list.insert(
+        0,
+        {
+            "file_id": file_id,
+            "filename": file.filename,
+            "description": description,
+            "upload_time": file_store[file_id]["upload_time"],
+            "total_slides": structure.total_slides,
+            "keywords": structure.keywords,
+        },
+    )
+
+    return {
+        "file_id": file_id,
+        "filename": file.filename,
+        "total_slides": structure.total_slides,
+        "outline": structure.outline,
+        "keywords": structure.keywords,
+    }
+
+
+@app.get("/api/files")
+async def list_files(limit: int = 0):
+    """列出所有已上传文件（摘要在上传时维护好，这里直接返回）"""
+    if limit > 0:
+        return {"files": file_summary_list[:limit]}
+    return {"files": file_summary_list}
+
+
+@app.get("/api/files/stats")
+async def files_stats():
+    """文件汇总统计：前端仪表只要几个数字，不必拉整份列表再自己算"""
+    total_slides = sum(f.get("total_slides", 0) for f in file_summary_list)
+    count = len(file_summary_list)
+    return {
+        "total_files": count,
+        "total_slides": total_slides,
+        "avg_slides": total_slides // count if count else 0,
+    }
+
+
+@app.get("/api/file/{file_id}")
+async def get_file(file_id: str):
+    """获取文件详情"""
+    record = file_store.get(file_id)
+    if not record:
+        raise HTTPException(status_code=404, detail="文件不存在")
+    structure = _load_structure(file_id)
+    return {
+        "file_id": file_id,
+        "filename": record["filename"],
+        "description": record.get("description", ""),
+        "upload_time": record["upload_time"],
+        "total_slides": record["total_slides"],
+        "outline": structure.outline,
+        "keywords": structure.keywords,
+    }
+
+
+@app.get("/api/file/{file_id}/slide/{slide_number}")
+async def get_slide(file_id: str, slide_number: int):
+    """获取单页幻灯片内容"""
+    record = file_store.get(file_id)
+    if not record:
+        raise HTTPException(status_code=404, detail="文件不存在")
+    structure = _load_structure(file_id)
+    if slide_number < 0 or slide_number >= len(structure.slides):
+        raise HTTPException(status_code=404, detail="页码超出范围")
+    return structure.slides[slide_number].model_dump()
+
+
+@app.get("/api/file/{file_id}/slides")
+async def get_slides(file_id: str, start: int = 0, end: int = 0):
+    """批量获取幻灯片内容（[start, end) 区间，end<=0 表示到末尾）
+
+    前端整份拉取时逐页 GET 会付 N 次往返开销，这里一次请求
+    返回一个区间，RPC 次数从 O(N) 降为 O(1)。
+    """
+    record = file_store.get(file_id)
+    if not record:
+        raise HTTPException(status_code=404, detail="文件不存在")
+    structure = _load_structure(file_id)
+    total = len(structure.slides)
+    if end <= 0 or end > total:
+        end = total
+    start = max(0, start)
+    if start >= end:
+        return {"slides": [], "start": start, "end": end, "total": total}
+    return {
+        "slides": [s.model_dump() for s in structure.slides[start:end]],
+        "start": start,
+        "end": end,
+        "total": total,
+    }
+
+
+@app.delete("/api/file/{file_id}")
+async def delete_file(file_id: str):
+    """删除文件及其产物"""
+    record = file_store.pop(file_id, None)
+    if not record:
+        raise HTTPException(status_code=404, detail="文件不存在")
+    Path(record["file_path"]).unlink(missing_ok=True)
+    (UPLOAD_DIR / f"{file_id}_parsed.json").unlink(missing_ok=True)
+    # 扩充结果以 result_id 为键，按反向映射逐个清掉内存条目和
+    # 溢出落盘的 msgpack；导出的 Markdown 笔记也一并删除
+    for result_id in expansion_ids_by_file.pop(file_id, ()):
+        expansion_results.pop(result_id, None)
+        (UPLOAD_DIR / f"{result_id}_expansion.msgpack").unlink(missing_ok=True)
+    (OUTPUT_DIR / f"{file_id}_expanded.md").unlink(missing_ok=True)
+    file_summary_list[:] = [f for f in file_summary_list if f["file_id"] != file_id]
+    # 向量库里的切片一并清理（服务不可用时静默跳过）
+    vdb = await asyncio.to_thread(_get_vector_db)
+    if vdb is not None:
+        try:
+            await asyncio.to_thread(vdb.delete_file, file_id)
+        except Exception as e:
+            print(f"向量删除失败 {file_id}: {e}")
+    return {"deleted": file_id}
+
+
+# ----------------------------------------------------------------------
+# 层级结构分析
+# ----------------------------------------------------------------------
+
+
+def analyze_hierarchical_structure_internal(file_id: str) -> List[dict]:
+    """内部层级分析：优先使用上传时缓存的解析结果"""
+    if file_id not in file_store:
+        raise HTTPException(status_code=404, detail="文件不存在")
+    structure = _load_structure(file_id)
+    return [s.model_dump() for s in structure.hierarchical_structure]
+
+
+@app.post("/api/analyze-hierarchy/{file_id}")
+async def analyze_hierarchical_structure(file_id: str, force: bool = False):
+    """分析 PPT 层级结构
+
+    上传时已完成一次完整解析，默认直接复用缓存的结果；
+    仅当 force=true 时重新解析文件。
+    """
+    record = file_store.get(file_id)
+    if not record:
+        raise HTTPException(status_code=404, detail="文件不存在")
+
+    if force:
+        # 绕开解析缓存真正重解析，并与上传路径一样丢进线程池，
+        # 不让 CPU 密集的解析阻塞事件循环
+        structure = await asyncio.to_thread(
+            ppt_parser.parse_pptx, record["file_path"], use_cache=False
+        )
+        record["structure"] = structure
+        record["structure_zstd"] = _compress_structure(structure)
+
+    hierarchy = analyze_hierarchical_structure_internal(file_id)
+    return {"file_id": file_id, "structure": hierarchy}
+
+
+@app.get("/api/hierarchy/{file_id}")
+async def get_hierarchy(file_id: str):
+    """获取层级结构（只读）"""
+    hierarchy = analyze_hierarchical_structure_internal(file_id)
+    return {"file_id": file_id, "structure": hierarchy}
+
+
+# ----------------------------------------------------------------------
+# LLM 内容扩充
+# ----------------------------------------------------------------------
+
+
+def _slides_payload(structure: PPTStructure, slide_numbers: List[int]) -> List[dict]:
+    """把指定页转成 LLM 输入"""
+    payload = []
+    for num in slide_numbers:
+        if 0 <= num < len(structure.slides):
+            slide = structure.slides[num]
+            text = "\n".join(slide.content + slide.bullet_points)
+            payload.append(
+                {"slide_number": num, "title": slide.title, "text": text}
+            )
+    return payload
+
+
+@app.post("/api/expand/{file_id}")
+async def expand_slides(file_id: str, raw_request: Request):
+    """扩充指定页"""
+    request = await decode_request(raw_request, SlideExpansionRequest)
+    if file_id not in file_store:
+        raise HTTPException(status_code=404, detail="文件不存在")
+    structure = _load_structure(file_id)
+
+    slide_numbers = request.slide_numbers or list(range(structure.total_slides))
+    payload = _slides_payload(structure, slide_numbers)
+
+    # asyncio.timeout 干净地传播取消，超时后不再等待已取消的任务；
+    # expand_multiple_slides 每页之间都有 await 点，会及时响应取消。
+    try:
+        async with asyncio.timeout(600):
+            expanded = await llm_client.expand_multiple_slides(
+                payload, request.expansion_types
+            )
+    except TimeoutError:
+        raise HTTPException(status_code=504, detail="扩充超时")
+
+    result_id = uuid.uuid4().hex
+    _store_expansion(
+        result_id,
+        {
+            "result_id": result_id,
+            "file_id": file_id,
+            "status": "completed",
+            "created_at": datetime.now().isoformat(),
+            "expanded_slides": expanded,
+        },
+    )
+    return {"result_id": result_id, "status": "completed", "count": len(expanded)}
+
+
+@app.post("/api/expand-by-hierarchy/{file_id}")
+async def expand_by_hierarchy(file_id: str, raw_request: Request):
+    """按层级结构智能扩充：只扩充正文页"""
+    request = await decode_request(raw_request, SlideExpansionRequest)
+    if file_id not in file_store:
+        raise HTTPException(status_code=404, detail="文件不存在")
+    structure = _load_structure(file_id)
+
+    hierarchy = analyze_hierarchical_structure_internal(file_id)
+    body_slides = [
+        item["slide_number"] for item in hierarchy if item["content_type"] == "正文"
+    ]
+    payload = _slides_payload(structure, body_slides)
+
+    try:
+        async with asyncio.timeout(600):
+            expanded = await llm_client.expand_multiple_slides(
+                payload, request.expansion_types
+            )
+    except TimeoutError:
+        raise HTTPException(status_code=504, detail="扩充超时")
+
+    result_id = uuid.uuid4().hex
+    _store_expansion(
+        result_id,
+        {
+            "result_id": result_id,
+            "file_id": file_id,
+            "status": "completed",
+            "created_at": datetime.now().isoformat(),
+            "expanded_slides": expanded,
+            "hierarchy": hierarchy,
+        },
+    )
+    await asyncio.to_thread(
+        save_hierarchy_expanded_markdown, file_id, structure, expanded, hierarchy
+    )
+    return {"result_id": result_id, "status": "completed", "count": len(expanded)}
+
+
+@app.get("/api/expansion/{result_id}")
+async def get_expansion(result_id: str):
+    """查询扩充结果"""
+    result = _load_expansion(result_id)
+    if not result:
+        raise HTTPException(status_code=404, detail="结果不存在")
+    return result
+
+
+@app.get("/api/expansion/{result_id}/wait")
+async def wait_expansion(result_id: str, timeout: float = 120):
+    """长轮询扩充结果：阻塞到就绪或超时
+
+    前端原来每 2 秒查一次，一次扩充最多 10 个往返；这里在服务端
+    以 0.2 秒粒度查内存字典（零网络成本），结果一就绪立即返回。
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + min(timeout, 300)
+    while True:
+        result = _load_expansion(result_id)
+        if result is not None and result.get("status") == "completed":
+            return result
+        if loop.time() >= deadline:
+            if result is None:
+                raise HTTPException(status_code=404, detail="结果不存在")
+            return result
+        await asyncio.sleep(0.2)
+
+
+# ----------------------------------------------------------------------
+# 向量检索（可选组件）
+# ----------------------------------------------------------------------
+
+_vector_db = None
+_vector_db_failed = False
+
+
+def _get_vector_db():
+    """懒加载向量库服务：Milvus 或模型不可用时整体降级为 None
+
+    导入与初始化都很重（加载编码模型、连接 Milvus），推迟到首次
+    用到时做；失败只记一次，之后的请求不再反复重试拖慢响应。
+    """
+    global _vector_db, _vector_db_failed
+    if _vector_db is None and not _vector_db_failed:
+        try:
+            from vector_db import VectorDBService
+
+            _vector_db = VectorDBService()
+        except Exception as e:
+            _vector_db_failed = True
+            print(f"向量库不可用，向量搜索已禁用: {e}")
+    return _vector_db
+
+
+def _index_file_vectors(file_id: str, structure: PPTStructure):
+    """把整份 PPT 写入向量库（后台线程里跑，失败不影响上传）"""
+    vdb = _get_vector_db()
+    if vdb is None:
+        return
+    try:
+        vdb.index_file(
+            file_id, structure.slides, structure.hierarchical_structure
+        )
+    except Exception as e:
+        print(f"向量索引失败 {file_id}: {e}")
+
+
+# ----------------------------------------------------------------------
+# 搜索
+# ----------------------------------------------------------------------
+
+
+@app.post("/api/search")
+async def search_content(raw_request: Request):
+    """简单文本搜索：对每页内容做关键词打分"""
+    request = await decode_request(raw_request, SearchRequest)
+    query_tokens = _tokenize(request.query.lower())
+    if not query_tokens:
+        return {"results": []}
+
+    candidates = []
+    for file_id in list(file_store.keys()):
+        record = file_store[file_id]
+        if request.file_id and file_id != request.file_id:
+            continue
+        token_index = record.get("token_index")
+        if token_index is None:
+            slide_texts, slide_titles, token_index = _build_search_index(
+                _load_structure(file_id)
+            )
+            record["slide_texts"] = slide_texts
+            record["slide_titles"] = slide_titles
+            record["token_index"] = token_index
+        slide_texts = record["slide_texts"]
+        slide_titles = record["slide_titles"]
+
+        # 倒排索引先取候选页，再只对候选页打分
+        candidate_nums = set()
+        misses = []
+        for token in query_tokens:
+            nums = token_index.get(token)
+            if nums:
+                candidate_nums |= nums
+            else:
+                misses.append(token)
+        # 索引没命中的 token（如单个汉字）退化为全文子串扫描
+        for token in misses:
+            candidate_nums.update(
+                num for num, text in enumerate(slide_texts) if token in text
+            )
+        for num in candidate_nums:
+            slide_text = slide_texts[num]
+            score = sum(slide_text.count(token) for token in query_tokens)
+            if score > 0:
+                candidates.append(
+                    {
+                        "file_id": file_id,
+                        "filename": record["filename"],
+                        "slide_number": num,
+                        "title": slide_titles[num],
+                        "score": score,
+                    }
+                )
+    candidates.sort(key=lambda x: x["score"], reverse=True)
+    return {"results": candidates[: request.top_k]}
+
+
+@app.post("/api/vector-search")
+async def vector_search(raw_request: Request):
+    """语义向量检索：按页聚合返回相似内容"""
+    request = await decode_request(raw_request, SearchRequest)
+    vdb = await asyncio.to_thread(_get_vector_db)
+    if vdb is None:
+        raise HTTPException(status_code=503, detail="向量搜索不可用")
+    try:
+        results = await asyncio.to_thread(
+            vdb.search_similar_slides, request.query, request.file_id, request.top_k
+        )
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"向量检索失败: {e}")
+
+    # 补上文件名与页标题，前端展示不必再逐条回查
+    for item in results:
+        record = file_store.get(item["file_id"])
+        if record is not None:
+            item["filename"] = record["filename"]
+            titles = record.get("slide_titles")
+            if titles and 0 <= item["slide_number"] < len(titles):
+                item["title"] = titles[item["slide_number"]]
+    return {"results": results}
+
+
+# ----------------------------------------------------------------------
+# 结果导出
+# ----------------------------------------------------------------------
+
+
+# 笔记模板在导入时编译一次，之后每次渲染都是生成代码里的紧凑循环
+_TEMPLATE_ENV = Environment(
+    loader=FileSystemLoader(Path(__file__).parent / "templates"),
+    autoescape=False,
+    trim_blocks=True,
+    lstrip_blocks=True,
+)
+_HIERARCHY_TMPL = _TEMPLATE_ENV.get_template("hierarchy_expanded.md.j2")
+
+
+def save_hierarchy_expanded_markdown(
+    file_id: str,
+    structure: PPTStructure,
+    expanded_slides: List[dict],
+    hierarchy_result: List[dict],
+):
+    """把层级扩充结果保存为 Markdown 学习笔记"""
+    markdown_path = OUTPUT_DIR / f"{file_id}_expanded.md"
+    # time.strftime 比构造完整 datetime 对象轻得多，整次保存只取一次时间戳
+    payload = _HIERARCHY_TMPL.render(
+        structure=structure,
+        expanded_slides=expanded_slides,
+        hierarchy=hierarchy_result,
+        now=time.strftime("%Y-%m-%d %H:%M:%S"),
+    )
+    # 一次性编码为 UTF-8 再整块写出，跳过 TextIOWrapper 的增量编码
+    markdown_path.write_bytes(payload.encode("utf-8"))
+    return markdown_path
+
+
+@app.get("/api/download/{file_id}")
+async def download_markdown(file_id: str):
+    """下载扩充后的 Markdown 笔记"""
+    record = file_store.get(file_id)
+    if not record:
+        raise HTTPException(status_code=404, detail="文件不存在")
+    markdown_path = OUTPUT_DIR / f"{file_id}_expanded.md"
+    if not markdown_path.exists():
+        raise HTTPException(status_code=404, detail="尚未生成笔记，请先执行扩充")
+    filename = f"{Path(record['filename']).stem}_学习笔记.md"
+    # 预先 stat 并带上 Content-Length，让 Starlette 走零拷贝 sendfile 路径
+    stat = markdown_path.stat()
+    return FileResponse(
+        path=markdown_path,
+        filename=filename,
+        media_type="text/markdown",
+        headers={"Content-Length": str(stat.st_size)},
+        stat_result=stat,
+    )
+
+
+if __name__ == "__main__":
+    import os
+
+    import uvicorn
+
+    # uvloop + httptools 换掉默认事件循环/HTTP 解析器（均为 C 实现）。
+    # 文件记录/扩充结果/搜索索引都挂在进程内字典上，多 worker 会把
+    # 上传和后续读请求轮询到不同进程直接 404，所以默认单 worker，
+    # 状态外置前多进程只能通过 UVICORN_WORKERS 显式开启。
+    # DEBUG=1 时回到热重载的开发模式
+    reload = os.getenv("DEBUG") == "1"
+    workers = int(os.getenv("UVICORN_WORKERS", "1"))
+    uvicorn.run(
+        "api:app",
+        host=settings.api_host,
+        port=settings.api_port,
+        workers=1 if reload else workers,
+        loop="uvloop",
+        http="httptools",
+        reload=reload,
+    )
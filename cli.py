@@ -0,0 +1,201 @@
+"""命令行批处理入口
+
+直接对本地 PPT 文件做解析 + LLM 扩充，输出 JSON 与 Markdown 笔记。
+"""
+
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+import orjson
+
+from config import settings
+from llm_client import llm_client
+from ppt_parser import PPTParser
+
+
+def process_file(
+    input_path: str,
+    output_dir: str,
+    expansion_types: Optional[List[str]] = None,
+    max_slides: int = 0,
+) -> Path:
+    """解析并扩充一个 PPT 文件，返回输出目录"""
+    input_file = Path(input_path)
+    if not input_file.exists():
+        print(f"❌ 文件不存在: {input_path}")
+        sys.exit(1)
+
+    out_dir = Path(output_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    print(f"📄 解析 {input_file.name} ...")
+    parser = PPTParser()
+    structure = parser.parse_pptx(str(input_file))
+    print(f"   共 {structure.total_slides} 页")
+
+    slides_to_process = []
+    for slide in structure.slides:
+        text = "\n".join(slide.content + slide.bullet_points)
+        if not (slide.title or text):
+            continue
+        slides_to_process.append(
+            {"slide_number": slide.slide_number, "title": slide.title, "text": text}
+        )
+    if max_slides > 0:
+        slides_to_process = slides_to_process[:max_slides]
+
+    total = len(slides_to_process)
+    print(f"🤖 开始扩充 {total} 页 ...")
+    # LLM 扩充是纯网络等待，串行逐页会把每次请求的秒级延迟全部叠加；
+    # 用有界线程池让多页同时在途，接近按并发度线性加速
+    expanded_results = [None] * total
+    with ThreadPoolExecutor(max_workers=settings.llm_concurrency) as pool:
+        futures = {
+            pool.submit(
+                llm_client.expand_slide, slide["title"], slide["text"], expansion_types
+            ): idx
+            for idx, slide in enumerate(slides_to_process)
+        }
+        done = 0
+        for fut in as_completed(futures):
+            idx = futures[fut]
+            slide = slides_to_process[idx]
+            try:
+                result = fut.result()
+                result["slide_number"] = slide["slide_number"]
+                result["title"] = slide["title"]
+            except Exception as e:
+                result = {
+                    "slide_number": slide["slide_number"],
+                    "title": slide["title"],
+                    "error": str(e),
+                }
+            expanded_results[idx] = result
+            done += 1
+            print(f"   [{done}/{total}] {slide['title'] or '(无标题)'}")
+
+    json_file = out_dir / f"{input_file.stem}_expanded.json"
+    # orjson 直接产出字节，序列化大结果比 stdlib json 快数倍，
+    # datetime 也无需手动 isoformat
+    json_file.write_bytes(
+        orjson.dumps(
+            {
+                "filename": input_file.name,
+                "processed_at": datetime.now(),
+                "total_slides": structure.total_slides,
+                "expanded_slides": expanded_results,
+            },
+            option=orjson.OPT_INDENT_2,
+        )
+    )
+    print(f"💾 JSON 已保存: {json_file}")
+
+    md_file = save_as_markdown(structure, expanded_results, out_dir, input_file.stem)
+    print(f"💾 Markdown 已保存: {md_file}")
+    return out_dir
+
+
+# 复用的小标题常量：导入时编码一次，写入时零编码开销
+_H_EXPLANATION = "#### 📖 原理说明\n\n".encode("utf-8")
+_H_EXAMPLES = "#### 💡 示例\n\n".encode("utf-8")
+_H_READINGS = "#### 🧠 知识深度探索\n\n".encode("utf-8")
+_H_QUIZ = "#### ✏️ 自测题\n\n".encode("utf-8")
+_H_OUTLINE = "## 大纲\n\n".encode("utf-8")
+_RULE = b"---\n\n"
+
+
+def save_as_markdown(structure, expanded_results, out_dir: Path, stem: str) -> Path:
+    """把扩充结果写成 Markdown 学习笔记（bytearray 增量拼接后一次写入）"""
+    md_file = out_dir / f"{stem}_笔记.md"
+    # bytearray 扩容按倍增摊销，省掉 join 前的临时列表与末尾合并趟
+    buf = bytearray()
+    ext = buf.extend
+
+    # 整次保存只取一次时间戳；time.strftime 比构造 datetime 对象轻得多
+    ts_human = time.strftime("%Y-%m-%d %H:%M:%S")
+
+    ext(f"# {structure.filename} - 学习笔记\n\n".encode("utf-8"))
+    ext(f"生成时间: {ts_human}\n\n".encode("utf-8"))
+    ext(f"总页数: {structure.total_slides}\n\n".encode("utf-8"))
+
+    if structure.outline:
+        ext(_H_OUTLINE)
+        for line in structure.outline:
+            ext(f"- {line}\n".encode("utf-8"))
+        ext(b"\n")
+
+    ext(_RULE)
+
+    for slide_result in expanded_results:
+        if slide_result.get("error"):
+            continue
+        slide_num = slide_result.get("slide_number", 0)
+        title = slide_result.get("title", f"幻灯片 {slide_num + 1}")
+        ext(f"## 第 {slide_num + 1} 页：{title}\n\n".encode("utf-8"))
+
+        explanation = slide_result.get("explanation", "")
+        if explanation:
+            ext(_H_EXPLANATION)
+            ext(f"{explanation}\n\n".encode("utf-8"))
+
+        examples = slide_result.get("examples", [])
+        if examples:
+            ext(_H_EXAMPLES)
+            for example in examples:
+                ext(f"{example}\n\n".encode("utf-8"))
+
+        readings = slide_result.get("extended_readings", [])
+        if readings:
+            ext(_H_READINGS)
+            display_name = f"延伸阅读 {slide_num + 1}"
+            for reading in readings:
+                title = reading.get("title") or display_name
+                content = reading.get("content", "")
+                ext(f"**{title}**\n{content}\n\n".encode("utf-8"))
+
+        quizzes = slide_result.get("quiz_questions", [])
+        if quizzes:
+            ext(_H_QUIZ)
+            for quiz in quizzes:
+                options = quiz.get("options") or {}
+                ext(f"**{quiz.get('question', '')}**\n\n".encode("utf-8"))
+                ext("".join(
+                    f"{key}. {value}\n" for key, value in options.items()
+                ).encode("utf-8"))
+                ext(f"\n答案: {quiz.get('answer', '')}\n\n".encode("utf-8"))
+
+        ext(_RULE)
+
+    ext(f"\n> 由 PPT 内容扩展智能体生成于 {ts_human}\n".encode("utf-8"))
+
+    # 超大文档走无缓冲句柄避免双重缓冲
+    if len(buf) > 1024 * 1024:
+        with open(md_file, "wb", buffering=0) as f:
+            f.write(buf)
+    else:
+        md_file.write_bytes(buf)
+    return md_file
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PPT 内容扩展智能体（命令行模式）")
+    parser.add_argument("input", help="PPT 文件路径")
+    parser.add_argument("-o", "--output", default=settings.output_dir, help="输出目录")
+    parser.add_argument("--max-slides", type=int, default=0, help="最多处理的页数（0 为全部）")
+    parser.add_argument(
+        "--types",
+        nargs="*",
+        default=None,
+        help="扩充类型（explanation example reading quiz）",
+    )
+    args = parser.parse_args()
+    process_file(args.input, args.output, args.types, args.max_slides)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""全局配置：通过 .env / 环境变量覆盖默认值"""
+
+from functools import lru_cache
+
+from pydantic_settings import BaseSettings
+
+
+class Settings(BaseSettings):
+    """应用配置项"""
+
+    # API 服务
+    api_host: str = "0.0.0.0"
+    api_port: int = 8010
+    debug: bool = False
+
+    # 文件目录
+    upload_dir: str = "./uploads"
+    output_dir: str = "./outputs"
+
+    # LLM 接口（OpenAI 兼容）
+    llm_api_key: str = ""
+    llm_base_url: str = "https://api.openai.com/v1"
+    llm_model: str = "gpt-4o-mini"
+    llm_timeout: int = 120
+    llm_concurrency: int = 8
+
+    # Milvus 向量库
+    milvus_host: str = "localhost"
+    milvus_port: int = 19530
+    milvus_collection: str = "ppt_slides"
+    embedding_model: str = "paraphrase-multilingual-MiniLM-L12-v2"
+    # HNSW 索引参数（可按数据规模通过环境变量调整）
+    milvus_hnsw_m: int = 16
+    milvus_hnsw_ef_construction: int = 200
+    milvus_hnsw_ef: int = 64
+
+    class Config:
+        env_file = ".env"
+        env_file_encoding = "utf-8"
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """进程内只实例化一次 Settings（.env 解析 + 字段校验只跑一遍）"""
+    return Settings()
+
+
+class _LazySettings:
+    """延迟代理：首次真正访问配置项时才触发 get_settings()"""
+
+    def __getattr__(self, name):
+        return getattr(get_settings(), name)
+
+
+settings = _LazySettings()
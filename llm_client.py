@@ -0,0 +1,124 @@
+"""LLM 客户端
+
+封装 OpenAI 兼容接口，负责对单页幻灯片做知识扩充：原理说明、
+示例、延伸阅读与自测题。包含基础的校验环节（Check layer），
+对模型返回做 JSON 解析失败兜底。
+"""
+
+import asyncio
+import json
+from typing import List, Optional
+
+import requests
+
+from config import settings
+
+EXPAND_PROMPT = """你是一名大学课程助教。下面是一页课程 PPT 的内容，请帮助学生深入理解。
+
+幻灯片标题：{title}
+幻灯片内容：
+{text}
+
+请输出 JSON，包含以下字段：
+- "explanation": 对本页知识点的原理说明（300 字以内，条理清晰）
+- "examples": 1-2 个具体例子或代码示例的列表
+- "extended_readings": 延伸阅读列表，每项含 "title" 和 "content"
+- "quiz_questions": 1-2 道自测题列表，每项含 "question"、"options"（字典）、"answer"、"analysis"
+
+只输出 JSON，不要输出其他内容。"""
+
+
+class LLMClient:
+    """OpenAI 兼容 LLM 调用封装"""
+
+    def __init__(self):
+        self.api_key = settings.llm_api_key
+        self.base_url = settings.llm_base_url.rstrip("/")
+        self.model = settings.llm_model
+        self.timeout = settings.llm_timeout
+
+    def _chat(self, prompt: str) -> str:
+        """调用 chat/completions 接口"""
+        response = requests.post(
+            f"{self.base_url}/chat/completions",
+            headers={
+                "Authorization": f"Bearer {self.api_key}",
+                "Content-Type": "application/json",
+            },
+            json={
+                "model": self.model,
+                "messages": [{"role": "user", "content": prompt}],
+                "temperature": 0.3,
+            },
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        return response.json()["choices"][0]["message"]["content"]
+
+    def expand_slide(
+        self, title: str, text: str, expansion_types: Optional[List[str]] = None
+    ) -> dict:
+        """扩充单页幻灯片内容，返回结构化结果"""
+        prompt = EXPAND_PROMPT.format(title=title or "(无标题)", text=text or "(无正文)")
+        raw = self._chat(prompt)
+
+        # 校验环节：模型可能输出 markdown 代码块包裹的 JSON
+        raw = raw.strip()
+        if raw.startswith("```"):
+            raw = raw.strip("`")
+            if raw.startswith("json"):
+                raw = raw[4:]
+        try:
+            result = json.loads(raw)
+        except (json.JSONDecodeError, ValueError):
+            result = {
+                "explanation": raw,
+                "examples": [],
+                "extended_readings": [],
+                "quiz_questions": [],
+            }
+        result.setdefault("explanation", "")
+        result.setdefault("examples", [])
+        result.setdefault("extended_readings", [])
+        result.setdefault("quiz_questions", [])
+        if expansion_types:
+            result["expansion_types"] = expansion_types
+        return result
+
+    async def expand_multiple_slides(
+        self,
+        slides: List[dict],
+        expansion_types: Optional[List[str]] = None,
+    ) -> List[dict]:
+        """批量扩充多页幻灯片（有界并发）
+
+        LLM 调用是纯网络等待，逐页 await 会把每次秒级延迟全部串联；
+        信号量限流下 gather 让 llm_concurrency 页同时在途，整批耗时
+        接近按并发度线性缩短，结果仍按入参顺序返回。
+        """
+        sem = asyncio.Semaphore(settings.llm_concurrency)
+
+        async def _expand_one(slide: dict) -> dict:
+            slide_number = slide.get("slide_number", 0)
+            try:
+                async with sem:
+                    expanded = await asyncio.to_thread(
+                        self.expand_slide,
+                        slide.get("title", ""),
+                        slide.get("text", ""),
+                        expansion_types,
+                    )
+                expanded["slide_number"] = slide_number
+                expanded["title"] = slide.get("title", "")
+                return expanded
+            except Exception as e:
+                return {
+                    "slide_number": slide_number,
+                    "title": slide.get("title", ""),
+                    "error": str(e),
+                }
+
+        return list(await asyncio.gather(*(_expand_one(s) for s in slides)))
+
+
+llm_client = LLMClient()
@@ -0,0 +1,74 @@
+"""统一启动入口：web（Streamlit 前端）/ api（FastAPI 后端）/ cli（批处理）"""
+
+import argparse
+import socket
+import subprocess
+import sys
+import time
+import webbrowser
+
+from config import settings
+
+
+def run_api():
+    """启动 FastAPI 后端（uvloop + httptools）
+
+    后端状态（文件记录、扩充结果、搜索索引）都在进程内存里，
+    多个 worker 之间不共享，默认必须单 worker；仅在状态外置后
+    才可通过 UVICORN_WORKERS 显式开多进程。
+    """
+    import os
+
+    import uvicorn
+
+    uvicorn.run(
+        "api:app",
+        host=settings.api_host,
+        port=settings.api_port,
+        workers=int(os.getenv("UVICORN_WORKERS", "1")),
+        loop="uvloop",
+        http="httptools",
+    )
+
+
+def run_web():
+    """启动 Streamlit 前端并打开浏览器"""
+    web_process = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", "web_app.py",
+         "--server.port", "8501"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    # 就绪探测代替固定 sleep(5)：端口可连即开浏览器，启动失败立即报错
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if web_process.poll() is not None:
+            stdout, stderr = web_process.communicate()
+            print("❌ 前端启动失败:")
+            print(stderr.decode("utf-8", errors="replace"))
+            sys.exit(1)
+        with socket.socket() as s:
+            s.settimeout(0.1)
+            if s.connect_ex(("127.0.0.1", 8501)) == 0:
+                break
+        time.sleep(0.1)
+    else:
+        web_process.terminate()
+        print("❌ 前端 30 秒内未就绪")
+        sys.exit(1)
+    webbrowser.open("http://localhost:8501")
+    web_process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PPT 内容扩展智能体")
+    parser.add_argument("mode", choices=["web", "api"], help="启动模式")
+    args = parser.parse_args()
+    if args.mode == "api":
+        run_api()
+    else:
+        run_web()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1066 @@
+"""PPT 解析模块
+
+使用 python-pptx 读取 PPT 文件，提取每页的标题、正文、项目符号、
+图片与备注，并在此基础上做层级结构分析（目录页 / 章节页 / 正文页 /
+结尾页等分类），供 API 与 CLI 共用。
+"""
+
+import bisect
+import itertools
+import os
+import re
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Optional
+
+import orjson
+from lxml import etree
+from pptx import Presentation
+from pydantic import BaseModel
+
+# 项目符号字符集：frozenset 的 isdisjoint 在 C 层一次判定，
+# 比逐字符的 any(...) 生成器循环快得多
+_BULLETS = frozenset("•◦▪‣⁃∙")
+# 行级项目符号判断用的全量符号集（含 -、* 等手写列表符）
+_BULLET_CHAR_SET = frozenset("•◦▪‣⁃∙○◉◎✓✔→➔➜➤-*")
+
+# 超过该页数的大 PPT 走进程池解析（小 PPT 不值得付进程启动成本）
+_PROCESS_POOL_THRESHOLD = 50
+
+
+def _slide_notes(slide) -> str:
+    """读取备注文本：has_notes_slide 与 notes_slide 各走一轮 lxml 遍历，
+    直接取属性并兜底异常可省掉前置判断那一趟"""
+    try:
+        ns = slide.notes_slide
+        return ns.notes_text_frame.text if ns is not None else ""
+    except (AttributeError, KeyError):
+        return ""
+
+# 直接对 slideN.xml 做 XPath 的快路径：python-pptx 每次 shape.text /
+# shape_type 访问都要走一轮 lxml 属性解析，预编译 XPath 一次取完
+_PPTX_NS = {
+    "a": "http://schemas.openxmlformats.org/drawingml/2006/main",
+    "p": "http://schemas.openxmlformats.org/presentationml/2006/main",
+    "r": "http://schemas.openxmlformats.org/officeDocument/2006/relationships",
+}
+_REL_NS = {"rel": "http://schemas.openxmlformats.org/package/2006/relationships"}
+_XP_SHAPES = etree.XPath("//p:sp", namespaces=_PPTX_NS)
+_XP_PLACEHOLDER = etree.XPath(".//p:nvSpPr/p:nvPr/p:ph", namespaces=_PPTX_NS)
+_XP_PARAGRAPHS = etree.XPath(".//a:p", namespaces=_PPTX_NS)
+_XP_RUNS = etree.XPath(".//a:t/text()", namespaces=_PPTX_NS)
+_XP_PICTURES = etree.XPath("//p:pic", namespaces=_PPTX_NS)
+_XP_SLD_IDS = etree.XPath("//p:sldIdLst/p:sldId/@r:id", namespaces=_PPTX_NS)
+_SLIDE_XML_RE = re.compile(r"ppt/slides/slide(\d+)\.xml$")
+_XP_RELATIONSHIPS = etree.XPath("//rel:Relationship", namespaces=_REL_NS)
+_NOTES_REL_TYPE = (
+    "http://schemas.openxmlformats.org/officeDocument/2006/relationships/notesSlide"
+)
+
+
+def _classify_levels(titles: List[str]) -> List[int]:
+    """整份 PPT 的标题批量判级：拼成一个缓冲让 SRE 引擎一趟扫完
+
+    逐页调用 _determine_level 每次都要重新进出正则引擎；把所有标题用
+    \\x00 连接后 finditer 一次，Python 层只剩按偏移把命中归位到页。
+    """
+    levels = [1 if not t else 4 for t in titles]
+    if not titles:
+        return levels
+    offsets = []
+    pos = 0
+    for t in titles:
+        offsets.append(pos)
+        pos += len(t) + 1
+    buf = "\x00".join(titles)
+    resolved = [False] * len(titles)
+    for m in _LEVEL_RE.finditer(buf):
+        idx = bisect.bisect_right(offsets, m.start()) - 1
+        if resolved[idx]:
+            continue
+        resolved[idx] = True
+        levels[idx] = 1 if m.group(1) else 2 if m.group(2) else 3
+    return levels
+
+# 层级关键词合并成一个已编译正则：一次 search 替代三轮 any(...) 扫描，
+# 命中的分组即层级
+_LEVEL_RE = re.compile(
+    r"(章节|chapter|part|单元|module)|(节|section|小节|subsection)|(标题|主题)",
+    re.IGNORECASE,
+)
+
+# 全部模式在导入时编译一次：re.match(str, ...) 每次调用都要进
+# sre 的全局缓存（带锁探测），热分类器直接持有编译对象
+_WS_RE = re.compile(r"[ 　]+")
+# 清洗用的"非保留字符"类：ASCII 可见字符、中日韩、全角区、
+# 常用标点与项目符号之外的一切都映射为空格
+_BAD_CHARS_RE = re.compile(
+    r"[^\t\n\r\x20-\x7e"
+    r"一-鿿"  # 中文
+    r"぀-ヿ"  # 日文假名
+    r"가-힯"  # 韩文
+    r"＀-￯"  # 全角字符
+    r"、。，；：？！「」『』（）【】《》·…—～"
+    r"•◦▪‣⁃∙○◉◎✓✔→➔➜➤]"
+)
+# 关键词分隔符都是单字符：translate 归一到一个哨兵再 split，
+# 两步 C 层操作比进 SRE 引擎的 re.split 便宜
+_KW_DELIM_TRANS = str.maketrans(dict.fromkeys("：:;；,，-—", "\x01"))
+_CJK_WORD_RE = re.compile(r"[一-龥]{2,6}")
+# 中英数合并成一个字符类，统计只需一趟扫描
+_COUNTED_CHARS_RE = re.compile(r"[一-龥a-zA-Z0-9]")
+
+# 同类交替式按首字符分桶：标题首字符查一次 dict 就能排除所有不可能
+# 的模式组，命中的桶也只需一次引擎进出
+_CN_NUMERALS = "一二三四五六七八九十"
+
+
+def _by_first_char(groups) -> dict:
+    """(首字符集合, 交替式) 序列 → {首字符: 编译好的模式}"""
+    table = {}
+    for chars, pattern in groups:
+        compiled = re.compile(pattern)
+        for c in chars:
+            table[c] = compiled
+    return table
+
+
+_CHAPTER_BY_FIRST = _by_first_char((
+    ("0123456789", r"\d+[\.、]\s*\S+|[0-9]+\s+\S+"),
+    ("第", r"第[一二三四五六七八九十百\d]+[章部分篇讲]"),
+    (_CN_NUMERALS, r"[一二三四五六七八九十]+[、.]\s*\S+"),
+    ("专", r"专题[一二三四五六七八九十\d]+"),
+    ("C", r"Chapter\s*\d+|CHAPTER\s*\d+"),
+    ("P", r"Part\s*[\dIVX]+|PART\s*[\dIVX]+"),
+    ("L", r"Lecture\s*\d+"),
+    ("U", r"Unit\s*\d+"),
+    ("M", r"Module\s*\d+"),
+))
+
+_SECTION_BY_FIRST = _by_first_char((
+    ("0123456789", r"\d+\.\d+[\.、]?\s*\S+|\d+\.\d+\.\d+"),
+    ("第", r"第[一二三四五六七八九十\d]+节"),
+    ("（(", r"[（(][一二三四五六七八九十\d]+[)）]"),
+    ("S", r"Section\s*\d+"),
+))
+
+_BULLET_NUM_BY_FIRST = _by_first_char((
+    ("0123456789", r"\d+[\.、\)）]\s*"),
+    (
+        "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ",
+        r"[a-zA-Z][\.、\)）]\s*",
+    ),
+    ("①②③④⑤⑥⑦⑧⑨⑩", r"[①②③④⑤⑥⑦⑧⑨⑩]"),
+    (_CN_NUMERALS, r"[一二三四五六七八九十]+[、.]\s*"),
+))
+
+# 分类关键词表：纯常量，模块加载时小写化并合并成单个交替式，
+# 每次实例化 PPTParser 不再重建；一次 search 替代 K 次 str.find
+_TOC_KEYWORDS_LOWER = tuple(k.lower() for k in (
+    "目录", "内容", "大纲", "目次", "提纲",
+    "contents", "agenda", "outline", "overview",
+))
+_END_KEYWORDS_LOWER = tuple(k.lower() for k in (
+    "谢谢", "感谢", "Thank", "Thanks", "THANKS",
+    "Q&A", "QA", "问答", "致谢", "参考文献",
+    "References", "The End", "结束", "完",
+))
+_CHAPTER_KEYWORDS_LOWER = ("章节", "chapter", "part", "单元", "module")
+_SECTION_KEYWORDS_LOWER = ("节", "section", "小节", "subsection")
+_SUMMARY_KEYWORDS_LOWER = ("总结", "小结", "summary", "回顾", "review")
+_TOC_KEYWORD_RE = re.compile(
+    "|".join(map(re.escape, _TOC_KEYWORDS_LOWER)), re.IGNORECASE
+)
+_END_KEYWORD_RE = re.compile(
+    "|".join(map(re.escape, _END_KEYWORDS_LOWER)), re.IGNORECASE
+)
+_CHAPTER_KEYWORD_RE = re.compile(
+    "|".join(map(re.escape, _CHAPTER_KEYWORDS_LOWER)), re.IGNORECASE
+)
+# 结尾页细分类别：各类关键词按分组合并，一趟 finditer 收齐所有
+# 命中类别后按优先级取第一个，替代十余次独立子串搜索
+_END_CATEGORY_RE = re.compile(
+    r"(致谢|感谢|acknowledg)"
+    r"|(参考文献|references|bibliography)"
+    r"|(q&a|qa|问答|提问)"
+    r"|(总结|小结|summary)"
+)
+_END_CATEGORY_NAMES = ("致谢页", "参考文献", "问答页", "总结页")
+
+_TITLE_PAGE_UNION = re.compile(r".{2,30}")
+
+# 八个代码特征模式合并成单个交替式：一次引擎进出扫完整页文本，
+# 替代八趟独立 search
+_CODE_COMBINED_RE = re.compile(
+    r"def\s+\w+\(|class\s+\w+|import\s+\w+|print\(|"
+    r"for\s+\w+\s+in|if\s+\w+|\{[^}]*\}|=[^=]*;"
+)
+# 行首缩进（四空格或制表符）的多行模式，用于代码启发式
+_INDENTED_LINE_RE = re.compile(r"^(?:    |\t)", re.MULTILINE)
+
+
+# 逐页对象在大 PPT 上成百上千地构造，字段全部由解析器内部产生、
+# 无需校验：slots 数据类省掉 __dict__ 与 pydantic 校验链开销，
+# 仅 PPTStructure 留在 pydantic 作为对外序列化边界
+@dataclass(slots=True)
+class SlideContent:
+    """单页幻灯片的原始内容"""
+
+    slide_number: int
+    title: str = ""
+    content: List[str] = field(default_factory=list)
+    bullet_points: List[str] = field(default_factory=list)
+    images: List[str] = field(default_factory=list)
+    notes: str = ""
+    level: int = 1
+    slide_type: str = "content"
+    hierarchical_path: List[str] = field(default_factory=list)
+
+    def model_dump(self) -> dict:
+        """与 pydantic 同名的序列化接口，方便调用方无感切换"""
+        return asdict(self)
+
+
+@dataclass(slots=True)
+class SlideStructure:
+    """单页幻灯片的结构化分类结果"""
+
+    slide_number: int
+    title: str = ""
+    content_type: str = "正文"
+    hierarchical_level: int = 1
+    parent_titles: List[str] = field(default_factory=list)
+    content_elements: List[dict] = field(default_factory=list)
+
+    def model_dump(self) -> dict:
+        """与 pydantic 同名的序列化接口，方便调用方无感切换"""
+        return asdict(self)
+
+
+class PPTStructure(BaseModel):
+    """整份 PPT 的解析结果"""
+
+    filename: str = ""
+    total_slides: int = 0
+    slides: List[SlideContent] = []
+    outline: List[str] = []
+    keywords: List[str] = []
+    hierarchical_structure: List[SlideStructure] = []
+
+
+class PPTParser:
+    """PPT 解析器：内容提取 + 层级结构分析"""
+
+    def __init__(self):
+        # 关键词表与合并正则都是常量，已提升到模块级（见文件头部），
+        # 构造器只保留目录检测状态：只需要"上一个目录页在哪"做相邻
+        # 判断，用单个计数器代替无界增长的页号列表
+        self.toc_found = False
+        self._last_toc_slide = -2
+
+    # ------------------------------------------------------------------
+    # 基础解析
+    # ------------------------------------------------------------------
+
+    def parse_pptx(self, file_path: str, use_cache: bool = True) -> PPTStructure:
+        """解析 PPT 文件，返回完整结构（按路径 + mtime 缓存）
+
+        use_cache=False 强制绕开缓存重新解析，并把新结果写回缓存，
+        供 force=true 的重新分析使用。
+        """
+        mtime = os.path.getmtime(file_path)
+        if not use_cache:
+            _parse_cached.cache_clear()
+        return _parse_cached(file_path, mtime)
+
+    def _parse_impl(self, file_path: str) -> PPTStructure:
+        """实际解析逻辑：优先走 lxml 快路径，失败时回退 python-pptx"""
+        try:
+            raw_slides = _extract_raw_slides_fast(file_path)
+        except Exception:
+            raw_slides = None
+
+        if raw_slides is not None:
+            # 清洗/分类是解释器密集型纯 Python；大 PPT 用进程池分摊
+            if len(raw_slides) > _PROCESS_POOL_THRESHOLD:
+                with ProcessPoolExecutor(max_workers=os.cpu_count()) as pool:
+                    slides_content = list(
+                        pool.map(_process_raw_slide, raw_slides, chunksize=8)
+                    )
+            else:
+                slides_content = [
+                    self._process_raw_slide(raw) for raw in raw_slides
+                ]
+        else:
+            # 回退路径：pptx 形状对象不可 pickle，先抽取可序列化原始文本
+            prs = Presentation(file_path)
+            if len(prs.slides) > _PROCESS_POOL_THRESHOLD:
+                raw_slides = [
+                    self._extract_raw_slide(slide, i)
+                    for i, slide in enumerate(prs.slides)
+                ]
+                with ProcessPoolExecutor(max_workers=os.cpu_count()) as pool:
+                    slides_content = list(
+                        pool.map(_process_raw_slide, raw_slides, chunksize=8)
+                    )
+            else:
+                slides_content = [
+                    self._parse_slide_enhanced(slide, i)
+                    for i, slide in enumerate(prs.slides)
+                ]
+
+        # 层级判定整份批量做一次，替代逐页进出正则引擎
+        for slide_content, level in zip(
+            slides_content, _classify_levels([s.title for s in slides_content])
+        ):
+            slide_content.level = level
+
+        # 大纲、关键词、层级结构在同一趟循环里完成，不再对 slides 各扫一遍
+        outline = []
+        keyword_set = set()
+        hierarchical = []
+        total = len(slides_content)
+        state = {"chapter": "", "section": ""}
+        for slide_content in slides_content:
+            if slide_content.title and slide_content.level <= 3:
+                outline.append(
+                    "  " * (slide_content.level - 1) + slide_content.title
+                )
+            self._collect_keywords(slide_content, keyword_set)
+            hierarchical.append(self._structure_step(slide_content, total, state))
+        # 只取前 10 个，islice 不必把整个集合物化成列表再切片
+        keywords = list(itertools.islice(keyword_set, 10))
+
+        # 字段全部由解析器内部产出，model_construct 跳过校验链；
+        # 外部输入（load_from_json）仍走带校验的构造
+        return PPTStructure.model_construct(
+            filename=Path(file_path).name,
+            total_slides=len(slides_content),
+            slides=slides_content,
+            outline=outline,
+            keywords=keywords,
+            hierarchical_structure=hierarchical,
+        )
+
+    def _parse_slide(self, slide, slide_num: int) -> SlideContent:
+        """解析单页幻灯片（简单版）"""
+        # title 属性每次访问都会做一轮占位符解析，抬升到循环外只取一次；
+        # 文本与图片在同一趟 shapes 遍历里完成，避免二次迭代
+        title_shape = slide.shapes.title
+        title = title_shape.text.strip() if title_shape else ""
+
+        content = []
+        bullet_points = []
+        images = []
+        for i, shape in enumerate(slide.shapes):
+            # 代理对象每次迭代新建，必须用基于 XML 元素的 == 而非 is
+            if shape == title_shape:
+                continue
+            if shape.shape_type == 13:  # PICTURE
+                images.append(f"slide_{slide_num}_image_{i}")
+                continue
+            text = getattr(shape, "text", "")
+            if not text:
+                continue
+            text = text.strip()
+            if not text:
+                continue
+            if not _BULLETS.isdisjoint(text[:10]):
+                bullet_points.append(text)
+            else:
+                content.append(text)
+
+        notes = _slide_notes(slide)
+
+        return SlideContent(
+            slide_number=slide_num,
+            title=title,
+            content=content,
+            bullet_points=bullet_points,
+            images=images,
+            notes=notes,
+            level=self._determine_level(title),
+        )
+
+    def _parse_slide_enhanced(self, slide, slide_num: int) -> SlideContent:
+        """解析单页幻灯片（增强版：带文本清洗和项目符号识别）"""
+        # shapes 只遍历一趟：每次 shape 属性访问都要走 lxml 解析，
+        # 文本与图片在同一个循环里就地分派
+        title_shape = slide.shapes.title
+        title = ""
+        if title_shape is not None and hasattr(title_shape, "text"):
+            title = self._clean_text(title_shape.text)
+
+        raw_texts = []
+        images = []
+        for i, shape in enumerate(slide.shapes):
+            # 代理对象每次迭代新建，必须用基于 XML 元素的 == 而非 is
+            if shape == title_shape:
+                continue
+            if shape.shape_type == 13:  # PICTURE
+                images.append(f"slide_{slide_num}_image_{i}")
+                continue
+            text = getattr(shape, "text", "")
+            if text:
+                raw_texts.append(text)
+            else:
+                # fill 只解析一次，hasattr + 再访问会走两轮属性解析
+                fill = getattr(shape, "fill", None)
+                if fill is not None and getattr(fill, "type", None) == 6:
+                    images.append(f"slide_{slide_num}_bgimage_{i}")
+
+        # 各形状文本拼起来只清洗一次，分摊正则引擎的启动成本。
+        # 形状边界用换行充当分隔符：后续本来就按行分类，语义不变
+        content = []
+        bullet_points = []
+        cleaned = self._clean_text("\n".join(raw_texts)) if raw_texts else ""
+        for line in cleaned.split("\n"):
+            line = line.strip()
+            if not line:
+                continue
+            if self._is_bullet_point(line):
+                bullet_points.append(line)
+            else:
+                content.append(line)
+
+        notes = _slide_notes(slide)
+
+        return SlideContent(
+            slide_number=slide_num,
+            title=title,
+            content=content,
+            bullet_points=bullet_points,
+            images=images,
+            notes=notes,
+            level=self._determine_level(title),
+        )
+
+    def _extract_raw_slide(self, slide, slide_num: int) -> dict:
+        """抽取单页的可序列化原始内容（供进程池工作函数消费）"""
+        title_shape = slide.shapes.title
+        title = ""
+        if title_shape is not None and hasattr(title_shape, "text"):
+            title = title_shape.text
+
+        texts = []
+        images = []
+        for i, shape in enumerate(slide.shapes):
+            # 代理对象每次迭代新建，必须用基于 XML 元素的 == 而非 is
+            if shape == title_shape:
+                continue
+            if shape.shape_type == 13:  # PICTURE
+                images.append(f"slide_{slide_num}_image_{i}")
+                continue
+            fill = getattr(shape, "fill", None)
+            if fill is not None and getattr(fill, "type", None) == 6:
+                images.append(f"slide_{slide_num}_bgimage_{i}")
+            text = getattr(shape, "text", "")
+            if text:
+                texts.append(text)
+
+        notes = _slide_notes(slide)
+        return {
+            "slide_number": slide_num,
+            "title": title,
+            "texts": texts,
+            "images": images,
+            "notes": notes,
+        }
+
+    def _clean_text(self, text: str) -> str:
+        """清洗文本：去掉控制字符和乱码，保留中英日韩与常用标点
+
+        两趟 C 层 regex.sub 替代原来的逐字符 ord 判断循环。
+        绝大多数文本框本来就干净，先 search 一次探测，没有坏字符
+        就跳过替换趟，只做空白归一。
+        """
+        if not text:
+            return ""
+        if _BAD_CHARS_RE.search(text) is None:
+            return _WS_RE.sub(" ", text).strip()
+        cleaned = _BAD_CHARS_RE.sub(" ", text)
+        return _WS_RE.sub(" ", cleaned).strip()
+
+    def _determine_level(self, title: str) -> int:
+        """根据标题关键词粗略判断层级"""
+        if not title:
+            return 1
+        m = _LEVEL_RE.search(title)
+        if not m:
+            return 4
+        if m.group(1):
+            return 1
+        if m.group(2):
+            return 2
+        return 3
+
+    # ------------------------------------------------------------------
+    # 大纲与关键词
+    # ------------------------------------------------------------------
+
+    def _collect_keywords(self, slide: SlideContent, keywords: set):
+        """把单页的标题与正文关键词累积进 keywords 集合
+
+        SlideContent 上的字符串在解析时已经清洗过，这里直接使用，
+        不再对整份内容重跑一遍清洗管线。
+        """
+        parts = slide.title.translate(_KW_DELIM_TRANS).split("\x01")
+        for part in parts:
+            part = part.strip()
+            if 1 < len(part) <= 20:
+                keywords.add(part)
+        for text in slide.content:
+            for word in _CJK_WORD_RE.findall(text):
+                keywords.add(word)
+
+    def _extract_outline(self, slides: List[SlideContent]) -> List[str]:
+        """提取大纲（层级 <= 3 的标题），保留给外部调用方"""
+        outline = []
+        for slide in slides:
+            if slide.title and slide.level <= 3:
+                outline.append("  " * (slide.level - 1) + slide.title)
+        return outline
+
+    def _extract_keywords(self, slides: List[SlideContent]) -> List[str]:
+        """从标题和正文提取关键词，保留给外部调用方"""
+        keywords = set()
+        for slide in slides:
+            self._collect_keywords(slide, keywords)
+        return list(itertools.islice(keywords, 10))
+
+    # ------------------------------------------------------------------
+    # 层级结构分析
+    # ------------------------------------------------------------------
+
+    def _analyze_hierarchical_structure(
+        self, slides: List[SlideContent]
+    ) -> List[SlideStructure]:
+        """分析整份 PPT 的层级结构，逐页输出分类结果"""
+        total = len(slides)
+        state = {"chapter": "", "section": ""}
+        return [self._structure_step(slide, total, state) for slide in slides]
+
+    def _structure_step(
+        self, slide: SlideContent, total: int, state: dict
+    ) -> SlideStructure:
+        """单页层级分类：state 携带当前章节/小节上下文"""
+        slide_num = slide.slide_number
+
+        if self._is_empty_slide(slide):
+            return SlideStructure(
+                slide_number=slide_num,
+                title=slide.title,
+                content_type="空白页",
+                hierarchical_level=99,
+            )
+
+        # 正文拼接与小写化按需做、每页至多一次，后续分类器全部复用；
+        # chain 避免 content + bullet_points 的临时列表拼接。
+        # 中段正文页（既非开头目录窗口也非结尾窗口、标题又不像章节）
+        # 根本不需要拼正文，传 None 让各分类器在真正用到时兜底拼接
+        title_lower = (slide.title or "").lower()
+        body = (
+            " ".join(itertools.chain(slide.content, slide.bullet_points))
+            if slide_num <= 5 or slide_num >= total - 3
+            else None
+        )
+
+        # 结尾页判定结果只在最后 3 页内生效，中段页面直接跳过检测
+        if slide_num >= total - 3:
+            end_type = self._detect_end_page(slide, title_lower, body.lower())
+            if end_type:
+                return self._create_end_structure(slide, end_type)
+
+        if slide_num == 0:
+            state["chapter"] = ""
+            state["section"] = ""
+            return self._classify_first_slide(slide)
+
+        if self._is_toc_slide_improved(slide, slide_num, body):
+            return self._create_toc_structure(slide)
+
+        content_type = self._classify_slide_content_strict(
+            slide, slide_num, total, body
+        )
+
+        if content_type == "章节标题":
+            state["chapter"] = slide.title
+            state["section"] = ""
+            return SlideStructure(
+                slide_number=slide_num,
+                title=slide.title,
+                content_type="章节标题",
+                hierarchical_level=1,
+                parent_titles=[],
+            )
+        if content_type == "小节标题":
+            state["section"] = slide.title
+            parents = [state["chapter"]] if state["chapter"] else []
+            return SlideStructure(
+                slide_number=slide_num,
+                title=slide.title,
+                content_type="小节标题",
+                hierarchical_level=2,
+                parent_titles=parents,
+            )
+
+        parents = []
+        if state["chapter"]:
+            parents.append(state["chapter"])
+        if state["section"]:
+            parents.append(state["section"])
+        return self._create_content_structure(slide, content_type, parents)
+
+    def _classify_slide_content_strict(
+        self,
+        slide: SlideContent,
+        slide_num: int,
+        total_slides: int,
+        body: Optional[str] = None,
+    ) -> str:
+        """严格分类单页内容类型"""
+        title = slide.title or ""
+
+        if self._is_toc_slide_improved_simple(slide, slide_num, body):
+            return "目录"
+
+        if self._detect_end_page_simple(slide):
+            return "结尾页"
+
+        # 字符数只统计一次，章节/小节两个阈值检查共用
+        char_count = None
+        if self._is_chapter_title_simple(title):
+            char_count = self._count_slide_text_chars(slide, body)
+            if char_count < 50:
+                return "章节标题"
+
+        if self._is_section_title_simple(title):
+            if char_count is None:
+                char_count = self._count_slide_text_chars(slide, body)
+            if char_count < 80:
+                return "小节标题"
+
+        if self._is_image_page(slide, char_count, body):
+            return "图片页"
+
+        return "正文"
+
+    def _classify_first_slide(self, slide: SlideContent) -> SlideStructure:
+        """首页默认为主标题页"""
+        if self._looks_like_main_title(slide.title):
+            return SlideStructure(
+                slide_number=slide.slide_number,
+                title=slide.title,
+                content_type="主标题",
+                hierarchical_level=0,
+            )
+        return SlideStructure(
+            slide_number=slide.slide_number,
+            title=slide.title,
+            content_type="主标题",
+            hierarchical_level=0,
+        )
+
+    # ------------------------------------------------------------------
+    # 标题 / 目录 / 结尾判断
+    # ------------------------------------------------------------------
+
+    def _is_chapter_title_simple(self, title: str) -> bool:
+        """判断是否为章节标题"""
+        if not title:
+            return False
+        title_clean = title.strip()
+
+        pattern = _CHAPTER_BY_FIRST.get(title_clean[:1])
+        if pattern is not None and pattern.match(title_clean):
+            return True
+
+        return bool(_CHAPTER_KEYWORD_RE.search(title_clean))
+
+    def _is_section_title_simple(self, title: str) -> bool:
+        """判断是否为小节标题"""
+        if not title:
+            return False
+        title_clean = title.strip()
+
+        pattern = _SECTION_BY_FIRST.get(title_clean[:1])
+        if pattern is not None and pattern.match(title_clean):
+            return True
+
+        title_lower = title_clean.lower()
+        for keyword in _SECTION_KEYWORDS_LOWER:
+            if keyword in title_lower:
+                return True
+        return False
+
+    def _looks_like_main_title(self, title: str) -> bool:
+        """判断是否像封面主标题"""
+        if not title:
+            return False
+        return bool(_TITLE_PAGE_UNION.match(title.strip()))
+
+    def _is_bullet_point(self, text: str) -> bool:
+        """判断一行文本是否为项目符号条目"""
+        if not text:
+            return False
+        # 符号全是单字符，前三个字符与符号集做一次 C 层交集判定即可，
+        # 不再每次调用重建列表 + 17 轮 startswith
+        if not _BULLET_CHAR_SET.isdisjoint(text[:3]):
+            return True
+        pattern = _BULLET_NUM_BY_FIRST.get(text[:1])
+        return pattern is not None and bool(pattern.match(text))
+
+    def _is_toc_slide_improved(
+        self, slide: SlideContent, slide_num: int, body: Optional[str] = None
+    ) -> bool:
+        """目录页检测（带连续页状态）"""
+        if self._is_toc_slide_improved_simple(slide, slide_num, body):
+            self.toc_found = True
+            self._last_toc_slide = slide_num
+            return True
+        # 目录的连续页：紧跟上一目录页且内容全是条目
+        if slide_num == self._last_toc_slide + 1:
+            if slide.bullet_points and not slide.content:
+                self._last_toc_slide = slide_num
+                return True
+        return False
+
+    def _is_toc_slide_improved_simple(
+        self, slide: SlideContent, slide_num: int, body: Optional[str] = None
+    ) -> bool:
+        """目录页检测（仅看文本特征）"""
+        if slide_num > 5:
+            return False
+        title = slide.title or ""
+        if _TOC_KEYWORD_RE.search(title):
+            return True
+        if body is None:
+            body = " ".join(itertools.chain(slide.content, slide.bullet_points))
+        return bool(_TOC_KEYWORD_RE.search(body[:30]))
+
+    def _detect_end_page_simple(self, slide: SlideContent) -> bool:
+        """结尾页检测（仅看关键词）"""
+        return bool(_END_KEYWORD_RE.search(slide.title or ""))
+
+    def _detect_end_page(
+        self,
+        slide: SlideContent,
+        title_lower: Optional[str] = None,
+        text_lower: Optional[str] = None,
+    ) -> Optional[str]:
+        """结尾页检测，返回具体类别（致谢/参考文献/问答/结尾页）"""
+        if title_lower is None:
+            title_lower = (slide.title or "").lower()
+        if text_lower is None:
+            text_lower = " ".join(
+                itertools.chain(slide.content, slide.bullet_points)
+            ).lower()
+
+        if not (
+            _END_KEYWORD_RE.search(text_lower)
+            or _END_KEYWORD_RE.search(title_lower)
+        ):
+            return None
+
+        # 进一步判断具体类别：一趟扫描收齐命中，再按优先级定类
+        seen = [False, False, False, False]
+        for m in _END_CATEGORY_RE.finditer(title_lower + " " + text_lower):
+            idx = m.lastindex - 1
+            seen[idx] = True
+            if idx == 0:
+                break
+        for hit, name in zip(seen, _END_CATEGORY_NAMES):
+            if hit:
+                return name
+        return "结尾页"
+
+    def _is_summary_page(self, slide: SlideContent) -> bool:
+        """判断是否为总结页"""
+        title_lower = (slide.title or "").lower()
+        for keyword in _SUMMARY_KEYWORDS_LOWER:
+            if keyword in title_lower:
+                return True
+        return False
+
+    def _is_image_page(
+        self,
+        slide: SlideContent,
+        char_count: Optional[int] = None,
+        body: Optional[str] = None,
+    ) -> bool:
+        """判断是否为图片页（有图且文字很少）
+
+        分类级联里章节/小节阈值检查可能已经统计过字符数，透传进来
+        直接复用，同一页不再重复扫一遍正则。
+        """
+        if not slide.images:
+            return False
+        if char_count is None:
+            char_count = self._count_slide_text_chars(slide, body)
+        return char_count < 20
+
+    def _is_empty_slide(self, slide: SlideContent) -> bool:
+        """判断是否为空白页"""
+        return (
+            not (slide.title and slide.title.strip())
+            and not slide.content
+            and not slide.bullet_points
+            and not slide.images
+        )
+
+    # ------------------------------------------------------------------
+    # 文本统计
+    # ------------------------------------------------------------------
+
+    def _count_slide_text_chars(
+        self, slide: SlideContent, body: Optional[str] = None
+    ) -> int:
+        """统计页面上的有效字符数（中文 + 英文 + 数字）
+
+        body 可传入 _structure_step 已拼好的正文串，避免每次统计都
+        重新做一轮 list 拼接 + join。
+        """
+        if body is None:
+            body = " ".join(itertools.chain(slide.content, slide.bullet_points))
+        total_text = (slide.title or "") + " " + body
+        return len(_COUNTED_CHARS_RE.findall(total_text))
+
+    def _count_text_chars(self, slide: SlideContent) -> int:
+        """统计页面有效字符数（内容元素分析用）
+
+        中/英/数三个字符类互不相交，合并进 _COUNTED_CHARS_RE 后一趟
+        finditer 求和即可，免去 += 逐段拼接与三次 findall 的列表分配。
+        """
+        total_text = " ".join(
+            itertools.chain((slide.title or "",), slide.content, slide.bullet_points)
+        )
+        return sum(1 for _ in _COUNTED_CHARS_RE.finditer(total_text))
+
+    def _contains_code(self, slide: SlideContent) -> bool:
+        """判断页面是否包含代码片段"""
+        all_text = "\n".join([slide.title or ""] + slide.content + slide.bullet_points)
+        if _CODE_COMBINED_RE.search(all_text):
+            return True
+        # 缩进行统计交给多行正则：split + startswith 的解释器循环
+        # 换成一趟 C 层扫描，凑满两行即提前返回
+        hits = _INDENTED_LINE_RE.finditer(all_text)
+        return sum(1 for _ in itertools.islice(hits, 2)) >= 2
+
+    # ------------------------------------------------------------------
+    # 结构构建
+    # ------------------------------------------------------------------
+
+    def _analyze_content_elements(self, slide: SlideContent) -> List[dict]:
+        """分析页面内容元素（文本/列表/代码/图片）"""
+        elements = []
+        for text in slide.content:
+            elements.append({"type": "text", "content": text})
+        for bullet in slide.bullet_points:
+            elements.append({"type": "bullet", "content": bullet})
+        if self._contains_code(slide):
+            elements.append({"type": "code", "content": ""})
+        for image in slide.images:
+            elements.append({"type": "image", "content": image})
+        return elements
+
+    def _create_toc_structure(self, slide: SlideContent) -> SlideStructure:
+        """构建目录页结构"""
+        return SlideStructure(
+            slide_number=slide.slide_number,
+            title=slide.title or "目录",
+            content_type="目录",
+            hierarchical_level=0,
+            content_elements=self._analyze_content_elements(slide),
+        )
+
+    def _create_end_structure(self, slide: SlideContent, end_type: str) -> SlideStructure:
+        """构建结尾页结构"""
+        return SlideStructure(
+            slide_number=slide.slide_number,
+            title=slide.title or end_type,
+            content_type=end_type,
+            hierarchical_level=98,
+            content_elements=self._analyze_content_elements(slide),
+        )
+
+    def _create_content_structure(
+        self, slide: SlideContent, content_type: str, parents: List[str]
+    ) -> SlideStructure:
+        """构建正文页结构"""
+        return SlideStructure(
+            slide_number=slide.slide_number,
+            title=slide.title,
+            content_type=content_type,
+            hierarchical_level=len(parents) + 1,
+            parent_titles=parents,
+            content_elements=self._analyze_content_elements(slide),
+        )
+
+    # ------------------------------------------------------------------
+    # 序列化
+    # ------------------------------------------------------------------
+
+    def _process_raw_slide(self, raw: dict) -> SlideContent:
+        """对抽取好的原始内容做清洗、分行与层级判断（纯 CPU）"""
+        title = self._clean_text(raw["title"])
+        content = []
+        bullet_points = []
+        # 整页文本只清洗一次，换行充当形状分隔符（下游本就按行分类）
+        texts = raw["texts"]
+        cleaned = self._clean_text("\n".join(texts)) if texts else ""
+        for line in cleaned.split("\n"):
+            line = line.strip()
+            if not line:
+                continue
+            if self._is_bullet_point(line):
+                bullet_points.append(line)
+            else:
+                content.append(line)
+
+        # level 由 _parse_impl 对整份标题批量判定，这里保持默认值
+        return SlideContent(
+            slide_number=raw["slide_number"],
+            title=title,
+            content=content,
+            bullet_points=bullet_points,
+            images=raw["images"],
+            notes=raw["notes"],
+        )
+
+    def save_to_json(self, structure: PPTStructure, output_path: str):
+        """保存解析结果为 JSON"""
+        Path(output_path).write_bytes(
+            orjson.dumps(structure.model_dump(), option=orjson.OPT_INDENT_2)
+        )
+
+    def load_from_json(self, input_path: str) -> PPTStructure:
+        """从 JSON 加载解析结果"""
+        return PPTStructure(**orjson.loads(Path(input_path).read_bytes()))
+
+
+def _rels_map(zf: "zipfile.ZipFile", rels_name: str) -> dict:
+    """解析 OPC 关系文件，返回 rId -> (Type, Target) 映射"""
+    root = etree.fromstring(zf.read(rels_name))
+    return {
+        rel.get("Id"): (rel.get("Type"), rel.get("Target"))
+        for rel in _XP_RELATIONSHIPS(root)
+    }
+
+
+def _ordered_slide_names(zf: "zipfile.ZipFile") -> List[str]:
+    """按播放顺序返回 slideN.xml 成员名
+
+    播放顺序由 presentation.xml 的 p:sldIdLst 定义（r:id 经关系文件
+    映射到具体 slide 部件）；幻灯片被重排后文件名序号不会改写，
+    按 slideN 排序会悄悄打乱页码。任一环节解析不出来就抛错，让
+    调用方回退 python-pptx。
+    """
+    pres_root = etree.fromstring(zf.read("ppt/presentation.xml"))
+    rels = _rels_map(zf, "ppt/_rels/presentation.xml.rels")
+    names = []
+    for rid in _XP_SLD_IDS(pres_root):
+        _, target = rels[rid]
+        name = "ppt/" + target.lstrip("/").removeprefix("ppt/")
+        if not _SLIDE_XML_RE.match(name):
+            raise ValueError(f"非常规的幻灯片部件路径: {target}")
+        names.append(name)
+    if not names:
+        raise ValueError("presentation.xml 中没有 sldIdLst 条目")
+    return names
+
+
+def _slide_notes_name(zf: "zipfile.ZipFile", slide_name: str) -> Optional[str]:
+    """从该页自身的关系文件解析备注部件名（没有备注时返回 None）"""
+    base = slide_name.rsplit("/", 1)[1]
+    rels_name = f"ppt/slides/_rels/{base}.rels"
+    try:
+        rels = _rels_map(zf, rels_name)
+    except KeyError:
+        return None
+    for rel_type, target in rels.values():
+        if rel_type == _NOTES_REL_TYPE:
+            # target 形如 ../notesSlides/notesSlideN.xml，相对 ppt/slides/
+            return "ppt/" + target.lstrip("/").removeprefix("../").removeprefix("ppt/")
+    return None
+
+
+def _extract_raw_slides_fast(file_path: str) -> List[dict]:
+    """lxml 快路径：直接对 pptx 内的 slideN.xml 做预编译 XPath 抽取
+
+    标题 / 正文 / 图片 / 备注都只需各一次 C 层 XPath 求值，替代
+    python-pptx 每个属性一轮的树遍历。页序与备注配对都经
+    presentation.xml / 各页 rels 解析，与 python-pptx 语义一致。
+    """
+    raw_slides = []
+    with zipfile.ZipFile(file_path) as zf:
+        slide_names = _ordered_slide_names(zf)
+        for slide_num, name in enumerate(slide_names):
+            root = etree.fromstring(zf.read(name))
+
+            title = ""
+            texts = []
+            for sp in _XP_SHAPES(root):
+                runs = _XP_RUNS(sp)
+                if not runs:
+                    continue
+                # 段落边界用换行还原，保持与 shape.text 相同的分行语义
+                paragraphs = [
+                    "".join(_XP_RUNS(p)) for p in _XP_PARAGRAPHS(sp)
+                ]
+                text = "\n".join(paragraphs)
+                ph = _XP_PLACEHOLDER(sp)
+                if not title and ph and ph[0].get("type") in ("title", "ctrTitle"):
+                    title = text
+                else:
+                    texts.append(text)
+
+            images = [
+                f"slide_{slide_num}_image_{i}"
+                for i in range(len(_XP_PICTURES(root)))
+            ]
+
+            notes = ""
+            notes_name = _slide_notes_name(zf, name)
+            if notes_name is not None:
+                try:
+                    notes_root = etree.fromstring(zf.read(notes_name))
+                    notes = "\n".join(
+                        "".join(_XP_RUNS(p)) for p in _XP_PARAGRAPHS(notes_root)
+                    )
+                except KeyError:
+                    pass
+
+            raw_slides.append(
+                {
+                    "slide_number": slide_num,
+                    "title": title,
+                    "texts": texts,
+                    "images": images,
+                    "notes": notes,
+                }
+            )
+    return raw_slides
+
+
+@lru_cache(maxsize=32)
+def _parse_cached(file_path: str, mtime: float) -> PPTStructure:
+    """解析结果缓存：XML 解析是 pptx 加载的主要成本，同一文件只做一次。
+
+    以 mtime 为键的一部分，文件被覆盖上传后自动失效。
+    """
+    return PPTParser()._parse_impl(file_path)
+
+
+# 每个工作进程内复用一个解析器实例
+_worker_parser: Optional[PPTParser] = None
+
+
+def _process_raw_slide(raw: dict) -> SlideContent:
+    """进程池工作函数入口"""
+    global _worker_parser
+    if _worker_parser is None:
+        _worker_parser = PPTParser()
+    return _worker_parser._process_raw_slide(raw)
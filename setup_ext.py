@@ -0,0 +1,28 @@
+"""可选的 Cython AOT 编译脚本
+
+PPTParser 的清洗/分类循环是纯解释器开销，编译成 C 扩展后大 PPT
+解析可提速数倍。本脚本不是必需的：不执行它时 ppt_parser.py 以普通
+Python 运行，行为完全一致。
+
+用法（需先 pip install cython setuptools）:
+
+    python setup_ext.py build_ext --inplace
+
+生成的 .so/.pyd 与 ppt_parser.py 同目录，导入时自动优先加载。
+"""
+
+from setuptools import setup
+
+from Cython.Build import cythonize
+
+setup(
+    name="ppt-parser-ext",
+    ext_modules=cythonize(
+        ["ppt_parser.py"],
+        compiler_directives={
+            "language_level": 3,
+            "boundscheck": False,
+            "wraparound": False,
+        },
+    ),
+)
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""lxml 快路径与 python-pptx 回退路径的解析一致性测试
+
+两条路径必须对同一份 PPT 产出相同的标题 / 正文 / 备注，
+否则快路径失败时回退会悄悄改变下游的关键词与分类结果。
+"""
+
+import pytest
+from pptx import Presentation
+from pptx.util import Inches
+
+from ppt_parser import PPTParser, _extract_raw_slides_fast
+
+
+@pytest.fixture(scope="module")
+def fixture_deck(tmp_path_factory):
+    """构造一份带标题页、正文页、备注的测试用 PPT"""
+    prs = Presentation()
+
+    slide = prs.slides.add_slide(prs.slide_layouts[0])
+    slide.shapes.title.text = "云计算导论"
+    slide.placeholders[1].text = "第一章 概述"
+
+    slide = prs.slides.add_slide(prs.slide_layouts[1])
+    slide.shapes.title.text = "1.1 什么是云计算"
+    slide.placeholders[1].text = "按需自助服务\n资源池化\n快速弹性伸缩"
+    slide.notes_slide.notes_text_frame.text = "讲解 NIST 五大特征"
+
+    slide = prs.slides.add_slide(prs.slide_layouts[1])
+    slide.shapes.title.text = "1.2 部署模型"
+    slide.placeholders[1].text = "公有云\n私有云\n混合云"
+
+    path = tmp_path_factory.mktemp("deck") / "fixture.pptx"
+    prs.save(str(path))
+    return str(path)
+
+
+def test_raw_extraction_parity(fixture_deck):
+    """快路径与 _extract_raw_slide 抽出的原始内容逐页一致"""
+    fast = _extract_raw_slides_fast(fixture_deck)
+
+    parser = PPTParser()
+    prs = Presentation(fixture_deck)
+    fallback = [
+        parser._extract_raw_slide(slide, i)
+        for i, slide in enumerate(prs.slides)
+    ]
+
+    assert len(fast) == len(fallback) == 3
+    for f, b in zip(fast, fallback):
+        assert f["slide_number"] == b["slide_number"]
+        assert f["title"] == b["title"]
+        assert f["texts"] == b["texts"]
+        assert f["notes"] == b["notes"]
+        # 图片占位名带形状下标，两条路径编号方式不同，只比数量
+        assert len(f["images"]) == len(b["images"])
+
+
+def test_processed_slide_parity(fixture_deck):
+    """经清洗分类后的 SlideContent 两条路径一致"""
+    parser = PPTParser()
+    fast = [
+        parser._process_raw_slide(raw)
+        for raw in _extract_raw_slides_fast(fixture_deck)
+    ]
+
+    prs = Presentation(fixture_deck)
+    fallback = [
+        parser._parse_slide_enhanced(slide, i)
+        for i, slide in enumerate(prs.slides)
+    ]
+
+    for f, b in zip(fast, fallback):
+        assert f.title == b.title
+        assert f.content == b.content
+        assert f.bullet_points == b.bullet_points
+        assert f.notes == b.notes
+
+
+def test_title_excluded_from_content(fixture_deck):
+    """标题形状不得混入正文（回退路径曾因 is 比较失效而泄漏）"""
+    parser = PPTParser()
+    prs = Presentation(fixture_deck)
+    for i, slide in enumerate(prs.slides):
+        parsed = parser._parse_slide_enhanced(slide, i)
+        assert parsed.title not in parsed.content
+        assert parsed.title not in parsed.bullet_points
+        raw = parser._extract_raw_slide(slide, i)
+        assert raw["title"] not in raw["texts"]
@@ -0,0 +1,498 @@
+"""Milvus 向量库服务
+
+把 PPT 切片向量化后写入 Milvus，支持基于语义的相关性检索。
+"""
+
+import json
+import re
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+from pymilvus import (
+    Collection,
+    CollectionSchema,
+    DataType,
+    FieldSchema,
+    connections,
+    utility,
+)
+from sentence_transformers import SentenceTransformer
+
+from config import settings
+from ppt_parser import SlideContent, SlideStructure
+
+# 单次 insert 携带的最大行数：批量写入摊销 gRPC 往返，
+# 又不至于单个请求过大
+_INSERT_BATCH_SIZE = 512
+
+# 文本→向量缓存的容量上限（FIFO 淘汰）
+_EMB_CACHE_SIZE = 4096
+
+# 切块时按非空白词定位的模式
+_WORD_SPAN_RE = re.compile(r"\S+")
+
+# int8 量化后的 ONNX 模型缓存目录（首次使用时导出，之后直接加载）
+_ONNX_MODEL_DIR = Path("./models/minilm_int8_onnx")
+_ONNX_MODEL_FILE = "model_quantized.onnx"
+
+
+class VectorDBService:
+    """向量库服务：切片、向量化、索引与检索"""
+
+    def __init__(self):
+        self.collection_name = settings.milvus_collection
+        self.dim = 384
+        self.embedding_model = None
+        self.collection = None
+        # 文本内容→向量缓存：课件里页脚/标题/目录条目大量重复，
+        # 命中即省掉一次完整的 transformer 前向
+        self._emb_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._init_embedding_model()
+        self._init_collection()
+
+    def _init_embedding_model(self):
+        """加载向量模型：优先 ONNX int8 量化推理，缺依赖时回退 FP32
+
+        MiniLM 的编码耗时集中在 transformer 矩阵乘；动态 int8 量化
+        （x86 VNNI / ARM sdot）通常能把延迟砍半而召回几乎不变。
+        optimum / onnxruntime 未安装时静默回退 SentenceTransformer。
+        """
+        self._ort_session = None
+        self._tokenizer = None
+        self.embedding_model = None
+        try:
+            self._init_onnx_model()
+        except Exception:
+            self._ort_session = None
+            self._tokenizer = None
+        if self._ort_session is None:
+            self.embedding_model = SentenceTransformer(settings.embedding_model)
+
+    def _init_onnx_model(self):
+        """加载（必要时先导出）int8 量化的 ONNX 编码模型"""
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        model_path = _ONNX_MODEL_DIR / _ONNX_MODEL_FILE
+        if not model_path.exists():
+            from optimum.onnxruntime import (
+                ORTModelForFeatureExtraction,
+                ORTQuantizer,
+            )
+            from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+            exported = ORTModelForFeatureExtraction.from_pretrained(
+                settings.embedding_model, export=True
+            )
+            exported.save_pretrained(_ONNX_MODEL_DIR)
+            quantizer = ORTQuantizer.from_pretrained(_ONNX_MODEL_DIR)
+            quantizer.quantize(
+                save_dir=_ONNX_MODEL_DIR,
+                quantization_config=AutoQuantizationConfig.avx512_vnni(
+                    is_static=False
+                ),
+            )
+        self._tokenizer = AutoTokenizer.from_pretrained(settings.embedding_model)
+        self._ort_session = ort.InferenceSession(
+            str(model_path), providers=["CPUExecutionProvider"]
+        )
+
+    def _init_collection(self):
+        """连接 Milvus 并创建集合"""
+        if not connections.has_connection("default"):
+            connections.connect(
+                "default", host=settings.milvus_host, port=settings.milvus_port
+            )
+
+        if utility.has_collection(self.collection_name):
+            self.collection = Collection(self.collection_name)
+        else:
+            fields = [
+                FieldSchema(name="id", dtype=DataType.INT64, is_primary=True, auto_id=True),
+                FieldSchema(name="chunk_id", dtype=DataType.VARCHAR, max_length=128),
+                FieldSchema(name="file_id", dtype=DataType.VARCHAR, max_length=64),
+                FieldSchema(name="slide_number", dtype=DataType.INT64),
+                FieldSchema(name="chunk_number", dtype=DataType.INT64),
+                FieldSchema(name="chunk_type", dtype=DataType.VARCHAR, max_length=32),
+                FieldSchema(name="document", dtype=DataType.VARCHAR, max_length=4096),
+                FieldSchema(name="metadata", dtype=DataType.VARCHAR, max_length=4096),
+                FieldSchema(name="timestamp", dtype=DataType.INT64),
+                # FP16 向量：模型输出已单位归一化，半精度损失可忽略，
+                # 每向量 768B 而非 1536B，检索扫描少搬一半内存
+                FieldSchema(name="embedding", dtype=DataType.FLOAT16_VECTOR, dim=self.dim),
+            ]
+            schema = CollectionSchema(fields, description="PPT 内容切片")
+            self.collection = Collection(self.collection_name, schema)
+            # HNSW 图索引：对 384 维小向量做对数级图游走，
+            # 同召回下查询延迟远低于 IVF_FLAT 的线性分区扫描
+            index_params = {
+                "metric_type": "IP",
+                "index_type": "HNSW",
+                "params": {
+                    "M": settings.milvus_hnsw_m,
+                    "efConstruction": settings.milvus_hnsw_ef_construction,
+                },
+            }
+            self.collection.create_index("embedding", index_params)
+        self.collection.load()
+
+    # ------------------------------------------------------------------
+    # 向量化
+    # ------------------------------------------------------------------
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        """批量向量化，带文本内容缓存
+
+        先按缓存把输入划成命中/未命中两组，只对未命中文本做一次
+        批量前向，再按原顺序散射回完整输出。重复出现的字符串
+        （每页页脚、相同标题等）完全不进模型。
+        """
+        out = np.empty((len(texts), self.dim), dtype=np.float32)
+        cache = self._emb_cache
+        miss_idx = []
+        miss_texts = []
+        for i, text in enumerate(texts):
+            vec = cache.get(text)
+            if vec is not None:
+                out[i] = vec
+            else:
+                miss_idx.append(i)
+                miss_texts.append(text)
+        if miss_texts:
+            encoded = self._encode_batch(miss_texts)
+            for j, i in enumerate(miss_idx):
+                out[i] = encoded[j]
+                cache[miss_texts[j]] = encoded[j]
+            while len(cache) > _EMB_CACHE_SIZE:
+                cache.popitem(last=False)
+        return out
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        """真正的模型前向：单次 encode 摊销启动开销
+
+        逐条 encode 的耗时基本花在 Python/框架调度上；一批文本一次
+        前向即可吃满矩阵乘。归一化交给 normalize_embeddings 在 C 层做。
+        """
+        if self._ort_session is not None:
+            return self._embed_batch_onnx(texts).astype(np.float32, copy=False)
+        return self.embedding_model.encode(
+            texts,
+            batch_size=64,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False,
+        ).astype(np.float32, copy=False)
+
+    def _embed_batch_onnx(self, texts: List[str]) -> np.ndarray:
+        """ONNX int8 路径：分词 → 前向 → 掩码均值池化 → L2 归一化"""
+        inputs = self._tokenizer(
+            texts,
+            padding="longest",
+            truncation=True,
+            max_length=128,
+            # 序列长度补到 8 的倍数，GEMM 走对齐的快核、不留尾块
+            pad_to_multiple_of=8,
+            return_tensors="np",
+        )
+        ort_inputs = {
+            name: inputs[name].astype(np.int64)
+            for name in ("input_ids", "attention_mask")
+            if name in inputs
+        }
+        if "token_type_ids" in inputs:
+            ort_inputs["token_type_ids"] = inputs["token_type_ids"].astype(np.int64)
+        hidden = self._ort_session.run(None, ort_inputs)[0]
+        mask = inputs["attention_mask"][:, :, None].astype(np.float32)
+        pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return pooled / np.clip(norms, 1e-12, None)
+
+    def generate_embedding(self, text: str) -> np.ndarray:
+        """生成单条文本的归一化 float32 向量"""
+        return self._embed_batch([text])[0]
+
+    def _chunk_text(self, text: str, max_length: int = 200, overlap: int = 20) -> List[str]:
+        """把长文本按词切成带重叠的块
+
+        记录每个词在原串中的起止偏移，块直接用原串切片产出：
+        单趟遍历、零中间词列表，也没有逐块 join 的小字符串分配。
+        """
+        if len(text) <= max_length:
+            return [text]
+        spans = [(m.start(), m.end()) for m in _WORD_SPAN_RE.finditer(text)]
+        if len(spans) <= 1:
+            return [text]
+        chunks = []
+        start_idx = 0
+        cur_len = 0
+        for i, (ws, we) in enumerate(spans):
+            cur_len += we - ws + 1
+            if cur_len >= max_length:
+                chunks.append(text[spans[start_idx][0] : we])
+                # 从块尾回退若干词作为重叠
+                j = i
+                overlap_len = 0
+                while j >= start_idx:
+                    overlap_len += spans[j][1] - spans[j][0] + 1
+                    if overlap_len >= overlap:
+                        break
+                    j -= 1
+                if j >= start_idx:
+                    start_idx = j
+                    cur_len = overlap_len
+        chunks.append(text[spans[start_idx][0] : spans[-1][1]])
+        return chunks
+
+    # ------------------------------------------------------------------
+    # 索引
+    # ------------------------------------------------------------------
+
+    def _slide_chunks(self, slide: SlideContent) -> List[dict]:
+        """把一页幻灯片拆成待索引的切片列表"""
+        chunks = []
+        if slide.title:
+            chunks.append({"text": slide.title, "type": "title"})
+        for text in slide.content:
+            for chunk in self._chunk_text(text):
+                chunks.append({"text": chunk, "type": "content"})
+        for bullet in slide.bullet_points:
+            chunks.append({"text": bullet, "type": "bullet"})
+        return chunks
+
+    def index_slide(
+        self,
+        file_id: str,
+        slide: SlideContent,
+        structure: Optional[SlideStructure] = None,
+        current_time: Optional[int] = None,
+    ) -> int:
+        """索引单页幻灯片（增量路径），返回写入的 chunk 数
+
+        current_time 可由批量调用方传入，同一批写入共用一个时间戳。
+        """
+        if current_time is None:
+            current_time = int(time.time())
+
+        content_chunks = self._slide_chunks(slide)
+        if not content_chunks:
+            return 0
+
+        # 全部切片拼成一批只做一次 encode，而不是每个切片各自前向
+        batch_embeddings = self._embed_batch([c["text"] for c in content_chunks])
+
+        chunk_ids = []
+        file_ids = []
+        slide_numbers = []
+        chunk_numbers = []
+        chunk_types = []
+        documents = []
+        metadatas = []
+        timestamps = []
+        for i, chunk in enumerate(content_chunks):
+            chunk_ids.append(f"{file_id}_{slide.slide_number}_{i}")
+            file_ids.append(file_id)
+            slide_numbers.append(slide.slide_number)
+            chunk_numbers.append(i)
+            chunk_types.append(chunk["type"])
+            documents.append(chunk["text"])
+            metadata = {"level": slide.level}
+            if structure is not None:
+                metadata["content_type"] = structure.content_type
+                metadata["hierarchical_level"] = structure.hierarchical_level
+            metadatas.append(json.dumps(metadata, ensure_ascii=False))
+            timestamps.append(current_time)
+
+        self.collection.insert(
+            [
+                chunk_ids,
+                file_ids,
+                slide_numbers,
+                chunk_numbers,
+                chunk_types,
+                documents,
+                metadatas,
+                timestamps,
+                batch_embeddings.astype(np.float16),
+            ]
+        )
+        return len(content_chunks)
+
+    def index_file(
+        self,
+        file_id: str,
+        slides: List[SlideContent],
+        structures: Optional[List[SlideStructure]] = None,
+    ) -> int:
+        """索引整份 PPT，返回写入的总 chunk 数
+
+        切片收集完后按固定批量走"编码下一批 ∥ 插入当前批"的流水线：
+        编码吃 CPU/GPU、insert 吃 gRPC 网络，两者都在各自库内释放
+        GIL，整体吞吐 ≈ max(编码, 插入) 而不是两者之和；flush 仍只
+        在文件末尾做一次。
+        """
+        current_time = int(time.time())
+
+        chunk_ids = []
+        file_ids = []
+        slide_numbers = []
+        chunk_numbers = []
+        chunk_types = []
+        documents = []
+        metadatas = []
+        timestamps = []
+        # 页号→结构一次建表，替代每页对 structures 的线性扫描
+        struct_by_num = {s.slide_number: s for s in (structures or [])}
+        for slide in slides:
+            slide_structure = struct_by_num.get(slide.slide_number)
+            metadata = {"level": slide.level}
+            if slide_structure is not None:
+                metadata["content_type"] = slide_structure.content_type
+                metadata["hierarchical_level"] = slide_structure.hierarchical_level
+            metadata_json = json.dumps(metadata, ensure_ascii=False)
+            for i, chunk in enumerate(self._slide_chunks(slide)):
+                chunk_ids.append(f"{file_id}_{slide.slide_number}_{i}")
+                file_ids.append(file_id)
+                slide_numbers.append(slide.slide_number)
+                chunk_numbers.append(i)
+                chunk_types.append(chunk["type"])
+                documents.append(chunk["text"])
+                metadatas.append(metadata_json)
+                timestamps.append(current_time)
+        if not documents:
+            return 0
+
+        meta_cols = [
+            chunk_ids,
+            file_ids,
+            slide_numbers,
+            chunk_numbers,
+            chunk_types,
+            documents,
+            metadatas,
+            timestamps,
+        ]
+        n = len(documents)
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            next_future = pool.submit(
+                self._embed_batch, documents[:_INSERT_BATCH_SIZE]
+            )
+            for start in range(0, n, _INSERT_BATCH_SIZE):
+                embeddings = next_future.result()
+                nxt = start + _INSERT_BATCH_SIZE
+                if nxt < n:
+                    next_future = pool.submit(
+                        self._embed_batch, documents[nxt : nxt + _INSERT_BATCH_SIZE]
+                    )
+                self.collection.insert(
+                    [col[start:nxt] for col in meta_cols]
+                    + [embeddings.astype(np.float16)]
+                )
+        self.collection.flush()
+        return n
+
+    def delete_file(self, file_id: str):
+        """删除某文件的全部向量"""
+        self.collection.delete(f'file_id == "{file_id}"')
+
+    # ------------------------------------------------------------------
+    # 检索
+    # ------------------------------------------------------------------
+
+    def search(
+        self,
+        query: str,
+        file_id: Optional[str] = None,
+        n_results: int = 10,
+        similarity_threshold: float = 0.3,
+    ) -> List[dict]:
+        """向量检索，返回带相似度的切片列表"""
+        embedding = self.generate_embedding(query).astype(np.float16)
+        expr = f'file_id == "{file_id}"' if file_id else None
+        results = self.collection.search(
+            data=[embedding],
+            anns_field="embedding",
+            param={"metric_type": "IP", "params": {"ef": settings.milvus_hnsw_ef}},
+            limit=n_results,
+            expr=expr,
+            output_fields=["chunk_id", "file_id", "slide_number", "chunk_type",
+                           "document", "metadata"],
+            # 读多写少的检索场景用有界陈旧度即可：Strong 每次查询都要
+            # 在 proxy 上等最新时间戳对齐，白付几毫秒
+            consistency_level="Bounded",
+        )
+
+        # 分数统一拉进 numpy 做裁剪与阈值过滤，只给幸存命中构造 dict
+        search_results = []
+        for hits in results:
+            if not hits:
+                continue
+            scores = np.fromiter(
+                (hit.score for hit in hits), dtype=np.float32, count=len(hits)
+            )
+            np.clip(scores, 0.0, 1.0, out=scores)
+            for i in np.nonzero(scores >= similarity_threshold)[0]:
+                hit = hits[i]
+                search_results.append(
+                    {
+                        "chunk_id": hit.entity.get("chunk_id"),
+                        "file_id": hit.entity.get("file_id"),
+                        "slide_number": hit.entity.get("slide_number"),
+                        "chunk_type": hit.entity.get("chunk_type"),
+                        "document": hit.entity.get("document"),
+                        "metadata": json.loads(hit.entity.get("metadata") or "{}"),
+                        "similarity": float(scores[i]),
+                    }
+                )
+        return search_results
+
+    def search_similar_slides(
+        self, query: str, file_id: Optional[str] = None, n_results: int = 5
+    ) -> List[dict]:
+        """按页聚合的相似检索"""
+        search_results = self.search(query, file_id, n_results * 3)
+        if not search_results:
+            return []
+
+        # 并行数组 + reduceat 分段归约：最大/平均相似度在 C 层算完，
+        # 只给最终前 n_results 个分组构造 dict
+        n = len(search_results)
+        file_index = {
+            f: i
+            for i, f in enumerate(dict.fromkeys(r["file_id"] for r in search_results))
+        }
+        fidx_arr = np.fromiter(
+            (file_index[r["file_id"]] for r in search_results), np.int64, count=n
+        )
+        slide_arr = np.fromiter(
+            (r["slide_number"] for r in search_results), np.int64, count=n
+        )
+        sim_arr = np.fromiter(
+            (r["similarity"] for r in search_results), np.float32, count=n
+        )
+        order = np.lexsort((slide_arr, fidx_arr))
+        keys = fidx_arr[order] * (int(slide_arr.max()) + 1) + slide_arr[order]
+        starts = np.nonzero(np.r_[True, np.diff(keys) != 0])[0]
+        counts = np.diff(np.r_[starts, n])
+        max_sims = np.maximum.reduceat(sim_arr[order], starts)
+        avg_sims = np.add.reduceat(sim_arr[order], starts) / counts
+
+        aggregated = []
+        for g in np.argsort(-max_sims)[:n_results]:
+            segment = order[starts[g] : starts[g] + counts[g]]
+            hits = [search_results[i] for i in segment]
+            aggregated.append(
+                {
+                    "file_id": hits[0]["file_id"],
+                    "slide_number": hits[0]["slide_number"],
+                    "documents": [h["document"] for h in hits],
+                    "chunk_types": [h["chunk_type"] for h in hits],
+                    "max_similarity": float(max_sims[g]),
+                    "similarities": [h["similarity"] for h in hits],
+                    "avg_similarity": float(avg_sims[g]),
+                }
+            )
+        return aggregated
@@ -0,0 +1,1038 @@
+"""Streamlit 前端
+
+PPT 上传、智能扩充、层级分析、向量搜索与文件管理界面。
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import jinja2
+import numpy as np
+import pandas as pd
+import requests
+import orjson
+import streamlit as st
+from requests.adapters import HTTPAdapter
+from requests_toolbelt.multipart.encoder import (
+    MultipartEncoder,
+    MultipartEncoderMonitor,
+)
+from urllib3.util.retry import Retry
+
+# 内容类型配色常量：挂在模块级，不随每次重跑重新分配
+_CONTENT_TYPE_COLORS = {
+    "主标题": "#DC2626",
+    "目录": "#7C3AED",
+    "章节标题": "#2563EB",
+    "小节标题": "#0891B2",
+    "正文": "#059669",
+    "图片页": "#D97706",
+    "结尾页": "#6B7280",
+    "致谢页": "#6B7280",
+    "参考文献": "#6B7280",
+    "问答页": "#6B7280",
+    "总结页": "#F59E0B",
+    "空白页": "#9CA3AF",
+}
+
+# 层级卡片模板：导入时编译一次，render 走编译好的直线代码，
+# autoescape 顺带兜住标题里的 HTML 特殊字符
+_HIER_CARD_TPL = jinja2.Template(
+    '{% for it in items %}'
+    '<div class="hierarchy-item" style="border-left: 5px solid {{ it.color }};">'
+    '<b>第 {{ it.num }} 页</b> '
+    '<span style="color:{{ it.color }};">[{{ it.type }}]</span> '
+    '{{ it.title }} '
+    '<span style="color:#94A3B8;">层级 {{ it.level }}</span>'
+    '</div>{% endfor %}',
+    autoescape=True,
+)
+
+API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8010")
+
+# 模块级连接池：Streamlit 每次交互都重跑整个脚本，裸 requests.get
+# 会为每次调用新建 TCP 连接；Session + keep-alive 让后续请求复用
+# 已建好的套接字，省掉每次 1-2 个 RTT 的握手
+_SESSION = requests.Session()
+# 显式声明压缩：后端开了 GZipMiddleware，大响应在线上缩 5-10 倍，
+# urllib3 收到后自动解压，orjson 直接吃解压后的字节
+_SESSION.headers.update({"Accept-Encoding": "gzip, deflate"})
+# 重试交给 urllib3：瞬时 5xx 自动退避重发，应用层不再自己 sleep 重试
+_SESSION.mount(
+    "http://",
+    HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=16,
+        max_retries=Retry(
+            total=3,
+            backoff_factor=0.3,
+            status_forcelist=[502, 503, 504],
+            allowed_methods=["GET", "POST", "DELETE"],
+        ),
+    ),
+)
+
+# (连接, 读取) 分离超时：建连卡死 3 秒即失败，不陪慢后端等满 180 秒
+_TIMEOUT = (3.05, 180)
+
+st.set_page_config(
+    page_title="PPT 内容扩展智能体",
+    page_icon="📚",
+    layout="wide",
+)
+
+# 全局样式与静态 HTML 都做成模块常量：Streamlit 每次交互整脚本
+# 重跑，常量避免重复构造大字符串，只有变量部分才走 format
+@st.cache_resource(show_spinner=False)
+def _page_css() -> str:
+    """页面样式：cache_resource 跨重跑跨会话只读盘拼串一次"""
+    css = (Path(__file__).parent / "static" / "app.css").read_text("utf-8")
+    return f"<style>{css}</style>"
+
+
+st.markdown(_page_css(), unsafe_allow_html=True)
+
+_HOME_INTRO_HTML = """
+    <div class="info-box">
+    <b>核心能力</b><br>
+    1️⃣ 语义解析：识别 PPT 的层级结构（目录、章节、正文、图片页）<br>
+    2️⃣ 知识扩充：针对每页知识点自动补充原理说明、示例与自测题<br>
+    3️⃣ 多维搜索：基于向量库的语义检索，快速定位相关内容
+    </div>
+    """
+
+_HOME_STEP_CARDS = (
+    '<div class="slide-card">📤 <b>第一步</b><br>上传 PPT 文件</div>',
+    '<div class="slide-card">🚀 <b>第二步</b><br>选择页面进行智能扩充</div>',
+    '<div class="slide-card">📥 <b>第三步</b><br>下载生成的学习笔记</div>',
+)
+
+_UPLOAD_SUCCESS_TPL = """
+    <div class="success-box">
+    ✅ 上传成功！<br>
+    文件: {filename}<br>
+    总页数: {total_slides}<br>
+    关键词: {keywords}
+    </div>
+    """
+
+
+# ----------------------------------------------------------------------
+# API 调用
+# ----------------------------------------------------------------------
+
+
+def check_api_health() -> bool:
+    """检查后端是否可用"""
+    try:
+        # 健康探测要么快要么快速失败：后端挂掉时每次重跑最多卡 2 秒
+        response = _SESSION.get(f"{API_BASE_URL}/health", timeout=2)
+        return response.status_code == 200
+    except requests.RequestException:
+        return False
+
+
+def call_api(endpoint: str, method: str = "GET", data=None, files=None):
+    """调用后端 API，返回解析后的 JSON（出错时返回带 error 的 dict）"""
+    url = f"{API_BASE_URL}{endpoint}"
+    try:
+        if method == "GET":
+            response = _SESSION.get(url, timeout=_TIMEOUT)
+        elif method == "POST":
+            if files:
+                response = _SESSION.post(url, data=data, files=files, timeout=_TIMEOUT)
+            else:
+                # orjson 序列化出站体，绕过 requests 内部的 stdlib json.dumps
+                response = _SESSION.post(
+                    url,
+                    data=orjson.dumps(data),
+                    headers={"Content-Type": "application/json"},
+                    timeout=_TIMEOUT,
+                )
+        elif method == "DELETE":
+            response = _SESSION.delete(url, timeout=_TIMEOUT)
+        else:
+            return {"error": f"不支持的方法: {method}"}
+        if response.status_code >= 400:
+            try:
+                detail = orjson.loads(response.content).get("detail", response.text)
+            except Exception:
+                detail = response.text
+            return {"error": detail}
+        # orjson 直接解析原始字节，解析大扩充结果比 response.json() 快数倍
+        return orjson.loads(response.content)
+    except Exception as e:
+        return {"error": str(e)}
+
+
+@st.cache_data(ttl=5, show_spinner=False)
+def _cached_health() -> bool:
+    """健康检查的短 TTL 缓存：侧边栏每次重跑不再都打一次 /health"""
+    return check_api_health()
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _cached_files():
+    """文件列表缓存：上传/删除后显式 clear 刷新"""
+    return call_api("/api/files")
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_file_detail(file_id: str):
+    """单文件元数据缓存：管理页行与详情块共用，免去同一重跑里的重复 GET"""
+    return call_api(f"/api/file/{file_id}")
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _filename_to_id():
+    """文件名到 file_id 的映射：建一次字典，重跑命中缓存不再逐项扫描"""
+    files_response = _cached_files()
+    files = files_response.get("files", []) if "error" not in files_response else []
+    return {f["filename"]: f["file_id"] for f in files}
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_hierarchy(file_id: str):
+    """层级结构缓存：筛选控件每动一下都重跑页面，命中后不再打后端"""
+    return call_api(f"/api/hierarchy/{file_id}")
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _fetch_markdown_note(file_id: str) -> bytes:
+    """笔记下载产物缓存：重复点击直接发缓存字节，不再回源重新生成"""
+    response = _SESSION.get(
+        f"{API_BASE_URL}/api/download/{file_id}", timeout=_TIMEOUT
+    )
+    response.raise_for_status()
+    return response.content
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _files_stats():
+    """文件汇总统计：后端一次算好，前端不再逐文件扫描"""
+    return call_api("/api/files/stats")
+
+
+def _placeholder_slide(slide_num: int) -> dict:
+    """拉取失败时的占位页：工厂统一字段，调用处不再手写字面量"""
+    return {
+        "slide_number": slide_num,
+        "title": f"幻灯片 {slide_num + 1}",
+        "content": [],
+        "bullet_points": [],
+        "images": [],
+        "notes": "",
+        "level": 1,
+    }
+
+
+@st.cache_data(ttl=300, max_entries=8, show_spinner=False)
+def get_all_slides_from_api(file_id: str, total_slides: int):
+    """分段批量拉取整份 PPT 的幻灯片内容（按 file_id 缓存整份结果）
+
+    逐页 GET 要付 N 次 HTTP 往返；批量端点把一整段收进一个响应，
+    100 页的往返次数从 100 次降到 2 次，进度条按段推进。
+    """
+    all_slides = []
+    batch = 50
+    starts = list(range(0, total_slides, batch))
+    progress = st.progress(0)
+
+    def _fetch(start):
+        end = min(start + batch, total_slides)
+        return start, end, call_api(f"/api/file/{file_id}/slides?start={start}&end={end}")
+
+    # 多段在途重叠：executor.map 保序返回，Session 连接池复用套接字
+    with ThreadPoolExecutor(max_workers=min(8, len(starts) or 1)) as pool:
+        for start, end, response in pool.map(_fetch, starts):
+            if "error" in response:
+                all_slides.extend(
+                    _placeholder_slide(slide_num) for slide_num in range(start, end)
+                )
+            else:
+                all_slides.extend(response.get("slides", []))
+            progress.progress(end / total_slides)
+    progress.empty()
+    # executor.map 保序返回、各段内部天然有序，无需再排序；
+    # DataFrame 返回让 st.cache_data 走 Arrow 序列化而非逐 dict pickle
+    return pd.DataFrame(all_slides)
+
+
+# ----------------------------------------------------------------------
+# 侧边栏
+# ----------------------------------------------------------------------
+
+
+def show_sidebar():
+    """侧边栏：导航 + 系统状态"""
+    st.sidebar.title("📚 PPT 扩展智能体")
+    page = st.sidebar.radio(
+        "功能导航",
+        ["🏠 首页", "📤 上传 PPT", "🚀 智能扩充", "🗂 文件管理", "🌳 层级分析", "🔍 向量搜索"],
+    )
+
+    st.sidebar.markdown("---")
+    st.sidebar.subheader("系统状态")
+    # 冷缓存时健康检查与汇总统计并行发出（Session 线程安全），
+    # 侧边栏等待时间从两次 RTT 之和变成取大者；缓存命中时零开销
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        health_future = pool.submit(_cached_health)
+        stats_future = pool.submit(_files_stats)
+        healthy = health_future.result()
+        stats = stats_future.result()
+    if healthy:
+        st.sidebar.success("✅ 后端服务正常")
+    else:
+        st.sidebar.error("❌ 后端服务不可用")
+    if "error" not in stats:
+        st.sidebar.metric("已上传文件", stats.get("total_files", 0))
+        st.sidebar.metric("总页数", stats.get("total_slides", 0))
+
+    return page
+
+
+# ----------------------------------------------------------------------
+# 页面
+# ----------------------------------------------------------------------
+
+
+def home_page():
+    st.markdown('<div class="main-header">📚 PPT 内容扩展智能体</div>', unsafe_allow_html=True)
+    st.markdown(
+        '<div class="sub-header">读懂 PPT 逻辑，自动查漏补缺的智能学习助手</div>',
+        unsafe_allow_html=True,
+    )
+    st.markdown(_HOME_INTRO_HTML, unsafe_allow_html=True)
+    for col, card in zip(st.columns(3), _HOME_STEP_CARDS):
+        with col:
+            st.markdown(card, unsafe_allow_html=True)
+
+
+def upload_ppt_streaming(uploaded_file, description: str, progress_cb=None):
+    """流式上传：MultipartEncoder 分块读文件对象
+
+    getvalue() 会把整份 PPT（最大 100MB）一次性读成 bytes，requests
+    组 multipart 时还要再拷一份；编码器直接从 Streamlit 的文件对象
+    分块读出，峰值内存减半。progress_cb(已发字节, 总字节) 在每个
+    分块发出后回调，用于驱动真实进度条。
+    """
+    uploaded_file.seek(0)
+    encoder = MultipartEncoder(
+        fields={
+            "file": (
+                uploaded_file.name,
+                uploaded_file,
+                uploaded_file.type or "application/octet-stream",
+            ),
+            "description": description,
+        }
+    )
+    body = encoder
+    if progress_cb is not None:
+        total = encoder.len
+        body = MultipartEncoderMonitor(
+            encoder, lambda m: progress_cb(m.bytes_read, total)
+        )
+    try:
+        response = _SESSION.post(
+            f"{API_BASE_URL}/api/upload",
+            data=body,
+            headers={"Content-Type": encoder.content_type},
+            timeout=(3.05, 300),
+        )
+        if response.status_code >= 400:
+            try:
+                detail = orjson.loads(response.content).get("detail", response.text)
+            except Exception:
+                detail = response.text
+            return {"error": detail}
+        return orjson.loads(response.content)
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def upload_page():
+    st.markdown('<div class="main-header">📤 上传 PPT</div>', unsafe_allow_html=True)
+    uploaded_file = st.file_uploader(
+        "选择 PPT 文件（最大 100MB）", type=["ppt", "pptx"]
+    )
+    description = st.text_input("文件描述（可选）", "")
+
+    if uploaded_file is not None and st.button("开始上传", type="primary"):
+        progress_bar = st.progress(0)
+        status_text = st.empty()
+
+        # 进度条挂在编码器的真实发送字节上，不再用固定百分比
+        # 加 0.5 秒假等待充数；上传完就交给重跑自然清屏
+        status_text.text("正在上传...")
+        response = upload_ppt_streaming(
+            uploaded_file,
+            description,
+            progress_cb=lambda sent, total: progress_bar.progress(
+                min(100, int(100 * sent / total)) if total else 100
+            ),
+        )
+
+        if "error" in response:
+            st.error(f"上传失败: {response['error']}")
+        else:
+            progress_bar.progress(100)
+            status_text.text("完成！")
+            _cached_files.clear()
+            _filename_to_id.clear()
+            _files_stats.clear()
+            _cached_file_detail.clear()
+            _cached_hierarchy.clear()
+            _cached_health.clear()
+            _fetch_markdown_note.clear()
+            st.markdown(
+                _UPLOAD_SUCCESS_TPL.format(
+                    filename=response["filename"],
+                    total_slides=response["total_slides"],
+                    keywords=", ".join(response.get("keywords", [])),
+                ),
+                unsafe_allow_html=True,
+            )
+            if response.get("outline"):
+                with st.expander("📋 大纲预览"):
+                    for line in response["outline"]:
+                        st.write(line)
+
+
+def expansion_page():
+    st.markdown('<div class="main-header">🚀 智能扩充</div>', unsafe_allow_html=True)
+
+    files_response = _cached_files()
+    if "error" in files_response or not files_response.get("files"):
+        st.warning("请先上传 PPT 文件")
+        return
+    files = files_response["files"]
+
+    file_options = {f["filename"]: f["file_id"] for f in files}
+    selected_name = st.selectbox("选择文件", list(file_options.keys()))
+    file_id = file_options[selected_name]
+    file_info = next(f for f in files if f["file_id"] == file_id)
+    total_slides = file_info["total_slides"]
+
+    mode = st.radio("扩充模式", ["🌳 智能层级扩充", "✋ 手动选择"], horizontal=True)
+
+    slide_numbers = []
+    if mode == "🌳 智能层级扩充":
+        hierarchy_response = _cached_hierarchy(file_id)
+        if "error" in hierarchy_response:
+            st.error(hierarchy_response["error"])
+            return
+        structure = hierarchy_response.get("structure", [])
+        show_hierarchical_structure_preview(structure)
+        # 向量化筛选正文页：布尔掩码在 C 层一次算完，
+        # 不再逐条目走 Python 级的 get + 比较
+        if structure:
+            df = pd.DataFrame(structure)
+            mask = (df["content_type"] == "正文") & df["slide_number"].between(
+                0, total_slides - 1
+            )
+            body_slides = df.loc[mask, "slide_number"].astype(int).tolist()
+        else:
+            body_slides = []
+        st.info(f"将自动扩充 {len(body_slides)} 个正文页")
+        slide_numbers = body_slides
+    else:
+        slides_df = get_all_slides_from_api(file_id, total_slides)
+        # 单个 multiselect 取代逐页 checkbox：N 个组件 + N 个
+        # session_state 键收成 1 个，每次重跑的前端增量是常数
+        title_by_num = {
+            int(num): (title if title else "(无标题)")
+            for num, title in zip(slides_df["slide_number"], slides_df["title"])
+        }
+        slide_numbers = st.multiselect(
+            "选择需要扩充的页面",
+            options=sorted(title_by_num),
+            format_func=lambda n: f"第 {n + 1} 页: {title_by_num[n]}",
+            key="select_slides",
+        )
+
+    expansion_types = st.multiselect(
+        "扩充类型",
+        ["explanation", "example", "reading", "quiz"],
+        default=["explanation", "example", "reading", "quiz"],
+    )
+
+    if st.button("开始扩充", type="primary"):
+        if not slide_numbers:
+            st.warning("请先选择要扩充的页面")
+            return
+        with st.spinner("正在扩充，请稍候..."):
+            endpoint = (
+                f"/api/expand-by-hierarchy/{file_id}"
+                if mode == "🌳 智能层级扩充"
+                else f"/api/expand/{file_id}"
+            )
+            response = call_api(
+                endpoint,
+                method="POST",
+                data={"slide_numbers": slide_numbers, "expansion_types": expansion_types},
+            )
+        if "error" in response:
+            st.error(response["error"])
+            return
+        result_id = response.get("result_id")
+
+        # 单次长轮询取代固定间隔的重复查询：后端阻塞到结果就绪
+        # 才返回，完成即刻可见；老后端没有该端点时回退到轮询
+        result = call_api(f"/api/expansion/{result_id}/wait?timeout=120")
+        if "error" in result:
+            # 回退轮询用指数退避：起步 0.5 秒快速确认，逐步放缓到
+            # 10 秒封顶，平均可见延迟和无效轮询次数都低于固定 2 秒
+            for i in range(12):
+                result = call_api(f"/api/expansion/{result_id}")
+                if "error" not in result and result.get("status") == "completed":
+                    break
+                time.sleep(min(10, 0.5 * 1.6 ** i))
+
+        if result and result.get("status") == "completed":
+            st.success(f"✅ 扩充完成，共 {len(result.get('expanded_slides', []))} 页")
+            # 重新扩充后笔记产物已变，必须丢掉 5 分钟 TTL 内的旧字节
+            _fetch_markdown_note.clear()
+            # 结果存进 session_state，预览在按钮分支外渲染：
+            # “加载更多”触发的重跑里本按钮为 False，写在分支内的
+            # 预览会直接消失，加载按钮永远点不出东西
+            st.session_state["last_expansion"] = {
+                "result": result,
+                "file_id": file_id,
+                "filename": selected_name,
+            }
+        else:
+            st.warning("扩充仍在进行中，请稍后到文件管理查看结果")
+
+    last = st.session_state.get("last_expansion")
+    if last:
+        show_expansion_preview(last["result"])
+        try:
+            st.download_button(
+                "📥 下载 Markdown 笔记",
+                data=_fetch_markdown_note(last["file_id"]),
+                file_name=f"{last['filename']}_学习笔记.md",
+                mime="text/markdown",
+            )
+        except requests.RequestException as e:
+            st.error(f"笔记尚未就绪: {e}")
+
+
+def show_hierarchical_structure_preview(structure):
+    """层级结构预览（整块拼好一次 st.markdown 发出）
+
+    每个 st.write 都是一条独立的 websocket 消息，整个面板的消息数
+    随条目数线性增长；拼成一个字符串后只发一条。
+    """
+    parts = []
+    for item in structure:
+        parts.append(
+            f"**第 {item.get('slide_number', 0) + 1} 页** - "
+            f"{item.get('content_type', '未知')}  \n"
+            f"标题: {item.get('title') or '(无标题)'}  \n"
+            f"层级: {item.get('hierarchical_level', 1)}"
+        )
+        if item.get("parent_titles"):
+            parts[-1] += f"  \n所属: {' > '.join(item['parent_titles'])}"
+    with st.expander("🌳 层级结构预览", expanded=False):
+        st.markdown("\n\n---\n\n".join(parts))
+
+
+# 单次预览渲染的 markdown 字符预算：超长扩充不再一次塞给前端，
+# 防止浏览器在一次 react-markdown 解析里卡几秒
+_MAX_PREVIEW_CHARS = 2000
+
+
+def _clip(text, limit: int) -> str:
+    # 中文内容没有词边界，textwrap.shorten 会把整段缩成占位符，
+    # 这里保持按字符截断
+    text = str(text)
+    return text[:limit] + "..." if len(text) > limit else text
+
+
+def _render_expansion_previews(slides):
+    """把扩充结果一次性渲染成 (展开器标题, markdown 块列表) 的列表
+
+    字符串拼接只在这里做一遍，之后的每次重跑直接回放现成的块，
+    不再为几十页内容反复切片/格式化。
+    """
+    previews = []
+    for slide in slides:
+        if slide.get("error"):
+            continue
+        header = (
+            f"第 {slide.get('slide_number', 0) + 1} 页: "
+            f"{slide.get('title') or '(无标题)'}"
+        )
+        blocks = []
+        explanation = slide.get("explanation", "")
+        if explanation:
+            blocks.append(
+                '<div class="expanded-content"><b>📖 原理说明</b><br>'
+                f"{_clip(explanation, 300)}</div>"
+            )
+        for example in slide.get("examples", [])[:2]:
+            blocks.append(
+                '<div class="expanded-content"><b>💡 示例</b><br>'
+                f"{_clip(example, 200)}</div>"
+            )
+        for reading in slide.get("extended_readings", [])[:2]:
+            blocks.append(
+                '<div class="expanded-content">'
+                f"<b>🧠 {reading.get('title', '延伸阅读')}</b><br>"
+                f"{_clip(reading.get('content', ''), 200)}</div>"
+            )
+        for quiz in slide.get("quiz_questions", [])[:2]:
+            option_lines = "".join(
+                f"{key}. {value}  \n"
+                for key, value in quiz.get("options", {}).items()
+            )
+            blocks.append(
+                f"**✏️ {quiz.get('question', '')}**\n\n"
+                f"{option_lines}\n答案: {quiz.get('answer', '')}"
+            )
+        previews.append((header, blocks))
+    return previews
+
+
+def show_expansion_preview(result):
+    """扩充结果预览（渲染一次存进 session_state，重跑按预算回放）"""
+    st.subheader("📖 扩充结果预览")
+    result_id = result.get("result_id", "")
+    cache_key = f"preview_{result_id}"
+    previews = st.session_state.get(cache_key)
+    if previews is None:
+        previews = _render_expansion_previews(result.get("expanded_slides", []))
+        st.session_state[cache_key] = previews
+
+    budget_key = f"preview_budget_{result_id}"
+    budget = st.session_state.get(budget_key, _MAX_PREVIEW_CHARS)
+    used = shown = 0
+    for header, blocks in previews:
+        with st.expander(header):
+            for block in blocks:
+                st.markdown(block, unsafe_allow_html=True)
+        used += sum(len(block) for block in blocks)
+        shown += 1
+        if used >= budget:
+            break
+    if shown < len(previews):
+        if st.button(f"📄 加载更多（剩余 {len(previews) - shown} 页）", key=f"more_{result_id}"):
+            st.session_state[budget_key] = budget + 4 * _MAX_PREVIEW_CHARS
+            st.rerun()
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def _type_bar_fig(type_items: tuple, colors: tuple):
+    """内容类型分布柱状图：按 (类型, 数量) 元组缓存，结构不变不重建"""
+    import plotly.graph_objects as go
+
+    fig = go.Figure(
+        go.Bar(
+            x=[t for t, _ in type_items],
+            y=[c for _, c in type_items],
+            marker_color=list(colors),
+        )
+    )
+    fig.update_layout(title="内容类型分布", height=300)
+    return fig
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def _level_line_fig(level_items: tuple):
+    """层级分布折线图：同样按计数元组缓存"""
+    import plotly.graph_objects as go
+
+    fig = go.Figure(
+        go.Scatter(
+            x=[f"层级 {lv}" for lv, _ in level_items],
+            y=[c for _, c in level_items],
+            mode="lines+markers",
+        )
+    )
+    fig.update_layout(title="层级分布", height=300)
+    return fig
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def _type_pie_fig(type_items: tuple, colors: tuple):
+    """内容类型占比饼图"""
+    import plotly.graph_objects as go
+
+    fig = go.Figure(
+        go.Pie(
+            labels=[t for t, _ in type_items],
+            values=[c for _, c in type_items],
+            marker_colors=list(colors),
+        )
+    )
+    fig.update_layout(title="内容类型占比", height=350)
+    return fig
+
+
+@st.cache_data(show_spinner=False)
+def _level_fig(levels: tuple):
+    """层级分布图：按层级元组缓存，重复打开同一文件详情不再重建"""
+    import plotly.graph_objects as go
+
+    counts = np.bincount(np.asarray(levels, dtype=np.int64))
+    present = np.nonzero(counts)[0]
+    fig = go.Figure(
+        go.Bar(
+            x=[f"层级 {i}" for i in present],
+            y=counts[present],
+            marker_color="#3B82F6",
+        )
+    )
+    fig.update_layout(title="层级分布", height=300)
+    return fig
+
+
+@st.cache_data(show_spinner=False)
+def _title_length_fig(title_lengths: tuple):
+    """标题长度分布图：np.histogram 服务端装箱，前端只画现成柱状"""
+    import plotly.graph_objects as go
+
+    counts, edges = np.histogram(np.asarray(title_lengths), bins=10)
+    centers = (edges[:-1] + edges[1:]) / 2
+    fig = go.Figure(go.Bar(x=centers, y=counts, marker_color="#10B981"))
+    fig.update_layout(title="标题长度分布", height=300)
+    return fig
+
+
+def file_management_page():
+    st.markdown('<div class="main-header">🗂 文件管理</div>', unsafe_allow_html=True)
+
+    files_response = _cached_files()
+    if "error" in files_response:
+        st.error(files_response["error"])
+        return
+    files = files_response.get("files", [])
+    if not files:
+        st.info("暂无已上传文件")
+        return
+
+    stats = _files_stats()
+    total_slides = stats.get("total_slides", 0)
+    avg_slides = stats.get("avg_slides", 0)
+    col1, col2, col3 = st.columns(3)
+    col1.metric("文件总数", len(files))
+    col2.metric("总页数", total_slides)
+    col3.metric("平均页数", avg_slides)
+
+    st.markdown("---")
+    # 分页渲染：每次重跑只产出固定 20 个文件卡片的组件，
+    # 文件成百上千时前端协议负载仍是常数而非 O(N)
+    page_size = 20
+    total_pages = (len(files) + page_size - 1) // page_size
+    if total_pages > 1:
+        page_idx = st.number_input("页码", 1, total_pages, 1)
+    else:
+        page_idx = 1
+    for file_info in files[(page_idx - 1) * page_size : page_idx * page_size]:
+        st.markdown(
+            f"""
+            <div class="slide-card">
+            <b>📄 {file_info['filename']}</b><br>
+            上传时间: {file_info['upload_time'][:19]} | 页数: {file_info['total_slides']}
+            </div>
+            """,
+            unsafe_allow_html=True,
+        )
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            if st.button("📋 详情", key=f"detail_{file_info['file_id']}"):
+                st.session_state["selected_file"] = file_info["file_id"]
+        with col2:
+            if st.button("🗑 删除", key=f"delete_{file_info['file_id']}"):
+                call_api(f"/api/file/{file_info['file_id']}", method="DELETE")
+                _cached_files.clear()
+                _filename_to_id.clear()
+                _files_stats.clear()
+                _cached_file_detail.clear()
+                _cached_hierarchy.clear()
+                get_all_slides_from_api.clear()
+                _fetch_markdown_note.clear()
+                st.rerun()
+
+    if st.session_state.get("selected_file"):
+        selected = next(
+            (f for f in files if f["file_id"] == st.session_state["selected_file"]), None
+        )
+        if selected:
+            show_file_details(selected)
+
+
+def show_file_details(file_info):
+    """文件详情：统计图表 + 幻灯片预览"""
+    st.markdown("---")
+    st.subheader(f"📋 {file_info['filename']} 详情")
+
+    detail = _cached_file_detail(file_info["file_id"])
+    if "error" in detail:
+        st.error(detail["error"])
+        return
+
+    tab1, tab2 = st.tabs(["📊 统计", "📑 幻灯片预览"])
+
+    with tab1:
+        hierarchy = _cached_hierarchy(file_info["file_id"])
+        if "error" not in hierarchy:
+            structure = hierarchy.get("structure", [])
+            levels = [item.get("hierarchical_level", 1) for item in structure]
+            title_lengths = [len(item.get("title") or "") for item in structure]
+
+            st.plotly_chart(_level_fig(tuple(levels)), use_container_width=True)
+            st.plotly_chart(
+                _title_length_fig(tuple(title_lengths)), use_container_width=True
+            )
+
+    with tab2:
+        preview_count = min(10, file_info["total_slides"])
+        # 预览页并行拉取：逐页串行 GET 会把每次 RTT 相加，
+        # 线程池让请求在途重叠，Session 连接池复用已有套接字
+        file_id = file_info["file_id"]
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            slides = list(
+                pool.map(
+                    lambda n: call_api(f"/api/file/{file_id}/slide/{n}"),
+                    range(preview_count),
+                )
+            )
+        for slide_num, slide in enumerate(slides):
+            if "error" in slide:
+                continue
+            with st.expander(f"第 {slide_num + 1} 页: {slide.get('title') or '(无标题)'}"):
+                body = "\n\n".join(slide.get("content", []))
+                bullets = "\n".join(f"- {b}" for b in slide.get("bullet_points", []))
+                st.markdown(f"{body}\n\n{bullets}" if bullets else body)
+
+
+def hierarchy_analysis_page():
+    st.markdown('<div class="main-header">🌳 层级分析</div>', unsafe_allow_html=True)
+
+    files_response = _cached_files()
+    if "error" in files_response or not files_response.get("files"):
+        st.warning("请先上传 PPT 文件")
+        return
+    files = files_response["files"]
+
+    file_options = {f["filename"]: f["file_id"] for f in files}
+    selected_name = st.selectbox("选择文件", list(file_options.keys()))
+    file_id = file_options[selected_name]
+
+    def _run_analysis(fid: str, force: bool):
+        # on_click 回调在 Streamlit 隐式重跑之前执行：POST 完成、
+        # 缓存清掉后页面自然带着新结果重画，省掉显式 st.rerun()
+        # 造成的第二遍整页执行
+        suffix = "?force=true" if force else ""
+        call_api(f"/api/analyze-hierarchy/{fid}{suffix}", method="POST")
+        _cached_hierarchy.clear()
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.button(
+            "🔍 开始层级分析",
+            type="primary",
+            on_click=_run_analysis,
+            args=(file_id, False),
+        )
+    with col2:
+        st.button("🔄 重新分析结构", on_click=_run_analysis, args=(file_id, True))
+
+    hierarchy_response = _cached_hierarchy(file_id)
+    if "error" in hierarchy_response:
+        st.info("尚未分析，请点击上方按钮")
+        return
+
+    structure = hierarchy_response.get("structure", [])
+
+    analyze_depth = st.selectbox("显示层级深度", ["全部", 1, 2, 3])
+    show_elements = st.selectbox("内容元素", ["全部", "仅有元素的页"])
+
+    display_hierarchical_structure(structure, analyze_depth, show_elements)
+
+
+@st.fragment
+def display_hierarchical_structure(structure, depth_filter="全部", element_filter="全部"):
+    """渲染层级结构卡片与统计图
+
+    整块包成 fragment：翻页按钮只触发本片段重跑，不再把整个
+    层级分析页（含 API 取数和选择控件）从头执行一遍。
+    """
+    # 两个筛选条件并进一趟推导，全不筛时直接复用原列表
+    if depth_filter == "全部" and element_filter == "全部":
+        filtered_structure = structure
+    else:
+        filtered_structure = [
+            item
+            for item in structure
+            if (
+                depth_filter == "全部"
+                or item.get("hierarchical_level", 1) == depth_filter
+            )
+            and (element_filter == "全部" or item.get("content_elements"))
+        ]
+
+    st.write(f"共 {len(filtered_structure)} 项")
+
+    # 分页渲染：只产出当前窗口的卡片，200 页的大 PPT 也是常数渲染量；
+    # 统计部分仍基于完整 structure，与分页无关
+    page_size = 30
+    total_pages = max(1, (len(filtered_structure) + page_size - 1) // page_size)
+    page_idx = st.session_state.get("hier_page", 0)
+    if page_idx >= total_pages:
+        page_idx = st.session_state["hier_page"] = 0
+    page_items = filtered_structure[page_idx * page_size : (page_idx + 1) * page_size]
+
+    # 所有卡片交给预编译的 Jinja2 模板一次 render，仍只发一条
+    # websocket 消息；循环体里不再有逐项 f-string 拼接
+    card_items = [
+        {
+            "num": item.get("slide_number", 0) + 1,
+            "type": item.get("content_type", "未知"),
+            "color": _CONTENT_TYPE_COLORS.get(item.get("content_type", "未知"), "#64748B"),
+            "title": item.get("title") or "(无标题)",
+            "level": item.get("hierarchical_level", 1),
+        }
+        for item in page_items
+    ]
+    st.markdown(_HIER_CARD_TPL.render(items=card_items), unsafe_allow_html=True)
+
+    # 内容元素改放批量卡片之后的折叠面板：不再每页一个切换按钮
+    # 加一个 session_state 键，面板内部同样整块发出
+    for item in page_items:
+        if not item.get("content_elements"):
+            continue
+        slide_num = item.get("slide_number", 0)
+        with st.expander(f"第 {slide_num + 1} 页内容元素"):
+            st.markdown(
+                "".join(
+                    '<div style="margin-left:2rem;color:#475569;">'
+                    f"[{elem.get('type', 'text')}] {str(elem.get('content', ''))[:100]}"
+                    "</div>"
+                    for elem in item["content_elements"]
+                ),
+                unsafe_allow_html=True,
+            )
+
+    if total_pages > 1:
+        col_prev, col_info, col_next = st.columns([1, 2, 1])
+        with col_prev:
+            if st.button("⬅️ 上一页", disabled=page_idx == 0, key="hier_prev"):
+                st.session_state["hier_page"] = page_idx - 1
+                st.rerun(scope="fragment")
+        col_info.write(f"第 {page_idx + 1} / {total_pages} 页")
+        with col_next:
+            if st.button("下一页 ➡️", disabled=page_idx >= total_pages - 1, key="hier_next"):
+                st.session_state["hier_page"] = page_idx + 1
+                st.rerun(scope="fragment")
+
+    # 统计
+    st.markdown("---")
+    st.subheader("📊 结构统计")
+    # 一趟循环同时累计类型计数、层级计数和最大层级，
+    # 不再对 structure 扫四遍各建各的临时结构
+    total_items = len(structure)
+    content_type_counts, level_counts = {}, {}
+    max_level = 1
+    for item in structure:
+        ct = item.get("content_type", "未知")
+        lv = item.get("hierarchical_level", 1)
+        content_type_counts[ct] = content_type_counts.get(ct, 0) + 1
+        level_counts[lv] = level_counts.get(lv, 0) + 1
+        if lv > max_level:
+            max_level = lv
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("总页数", total_items)
+    col2.metric("最大层级", max_level)
+    col3.metric("内容类型数", len(content_type_counts))
+
+    type_items = tuple(sorted(content_type_counts.items(), key=lambda x: -x[1]))
+    type_colors = tuple(_CONTENT_TYPE_COLORS.get(t, "#64748B") for t, _ in type_items)
+    # 十来行的小计数表用 st.table 直接吃列表，省掉 DataFrame 构造
+    # （类型推断 + Block 管理）和每次重跑的 Arrow 序列化
+    st.table(
+        {"内容类型": [t for t, _ in type_items], "数量": [c for _, c in type_items]}
+    )
+
+    # 图对象构建 + JSON 序列化由缓存工厂承担，无关交互的重跑直接复用
+    st.plotly_chart(_type_bar_fig(type_items, type_colors), use_container_width=True)
+    st.plotly_chart(
+        _level_line_fig(tuple(sorted(level_counts.items()))), use_container_width=True
+    )
+
+    show_content_type_distribution(type_items, type_colors)
+
+
+def show_content_type_distribution(type_items: tuple, type_colors: tuple):
+    """内容类型占比饼图（直接消费上游算好的计数元组）"""
+    st.plotly_chart(_type_pie_fig(type_items, type_colors), use_container_width=True)
+
+
+def vector_search_page():
+    st.markdown('<div class="main-header">🔍 向量搜索</div>', unsafe_allow_html=True)
+
+    filename_to_id = _filename_to_id()
+
+    scope = st.selectbox("搜索范围", ["全部文件"] + list(filename_to_id.keys()))
+    query = st.text_input("搜索内容", placeholder="输入关键词或问题...")
+    top_k = st.slider("返回结果数", 1, 20, 5)
+
+    if st.button("🔍 搜索", type="primary") and query:
+        data = {"query": query, "top_k": top_k}
+        if scope != "全部文件":
+            data["file_id"] = filename_to_id[scope]
+        with st.spinner("搜索中..."):
+            response = call_api("/api/vector-search", method="POST", data=data)
+        if "error" in response:
+            # 向量服务未部署时回退关键词搜索，页面保持可用
+            st.caption("向量搜索不可用，已回退关键词搜索")
+            response = call_api("/api/search", method="POST", data=data)
+        if "error" in response:
+            st.error(response["error"])
+            return
+        results = response.get("results", [])
+        if not results:
+            st.info("未找到相关内容")
+            return
+        for result in results:
+            similarity = result.get("max_similarity")
+            score_line = (
+                f"相似度: {similarity:.2f}"
+                if similarity is not None
+                else f"得分: {result.get('score', 0)}"
+            )
+            st.markdown(
+                f"""
+                <div class="slide-card">
+                <b>📄 {result.get('filename', '')}</b> - 第 {result.get('slide_number', 0) + 1} 页<br>
+                {result.get('title') or '(无标题)'}<br>
+                <span style="color:#94A3B8;">{score_line}</span>
+                </div>
+                """,
+                unsafe_allow_html=True,
+            )
+
+
+def main():
+    page = show_sidebar()
+    if page == "🏠 首页":
+        home_page()
+    elif page == "📤 上传 PPT":
+        upload_page()
+    elif page == "🚀 智能扩充":
+        expansion_page()
+    elif page == "🗂 文件管理":
+        file_management_page()
+    elif page == "🌳 层级分析":
+        hierarchy_analysis_page()
+    elif page == "🔍 向量搜索":
+        vector_search_page()
+
+
+if __name__ == "__main__":
+    main()